@@ -9,9 +9,12 @@ from urllib.parse import urlparse, parse_qs
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import our services
-from app.services.geocoding import GeocodingService
+from app.services.geocoding import GeocodingService, LOCAL_SOURCES
 from app.services.validation import ValidationService
 from app.services.cache import CacheService
+from app.models.request import DetailLevel
+from app.utils.deadline import Deadline
+from app.config import settings
 
 class handler(BaseHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
@@ -58,8 +61,9 @@ class handler(BaseHTTPRequestHandler):
                 "status": "healthy",
                 "services": {
                     "cache": "up",
-                    "geocoding": "up"
+                    "geocoding": "degraded" if self.geocoding_service.is_degraded() else "up"
                 },
+                "providers": self.geocoding_service.provider_status(),
                 "timestamp": datetime.utcnow()
             }
             self._send_json_response(response)
@@ -85,6 +89,7 @@ class handler(BaseHTTPRequestHandler):
             lat = float(data['latitude'])
             lng = float(data['longitude'])
             language = data.get('language', 'en')
+            detail = DetailLevel(data.get('detail', DetailLevel.STREET.value))
             
             # Validate coordinates
             try:
@@ -93,10 +98,11 @@ class handler(BaseHTTPRequestHandler):
                 self._send_error_response(400, str(e))
                 return
             
-            # Run async geocoding
-            result = asyncio.run(self._geocode_async(lat, lng, language))
+            # Run async geocoding within the response time budget
+            deadline = Deadline.from_ms(settings.MAX_RESPONSE_TIME_MS)
+            result = asyncio.run(self._run_async(self._geocode_async(lat, lng, language, deadline, detail)))
             self._send_json_response(result)
-            
+        
         except json.JSONDecodeError:
             self._send_error_response(400, "Invalid JSON")
         except ValueError as e:
@@ -122,46 +128,96 @@ class handler(BaseHTTPRequestHandler):
             
             locations = data['locations']
             language = data.get('language', 'en')
+            try:
+                detail = DetailLevel(data.get('detail', DetailLevel.STREET.value))
+            except ValueError as e:
+                self._send_error_response(400, str(e))
+                return
             
             if len(locations) > 100:
                 self._send_error_response(400, "Maximum 100 locations allowed")
                 return
             
             # Process batch
-            result = asyncio.run(self._batch_geocode_async(locations, language))
+            deadline = Deadline.from_ms(settings.BATCH_MAX_RESPONSE_TIME_MS)
+            result = asyncio.run(self._run_async(self._batch_geocode_async(locations, language, deadline, detail)))
             self._send_json_response(result)
-            
+        
         except json.JSONDecodeError:
             self._send_error_response(400, "Invalid JSON")
         except Exception as e:
             self._send_error_response(500, f"Internal server error: {str(e)}")
     
-    async def _geocode_async(self, lat, lng, language):
+    async def _run_async(self, coro):
+        """Run a coroutine and release the HTTP and cache clients bound to this event loop"""
+        try:
+            return await coro
+        finally:
+            await self.geocoding_service.close()
+            await self.cache_service.close()
+    
+    async def _geocode_async(self, lat, lng, language, deadline=None, detail=DetailLevel.STREET):
         """Async geocoding with caching"""
         try:
             # Check cache first
-            cached_result = await self.cache_service.get_location(lat, lng, language)
+            cached_result = await self.cache_service.get_location(lat, lng, language, detail)
             if cached_result:
-                return self._format_clean_response(cached_result, lat, lng, cached=True)
-            
-            # Get location from geocoding service
-            location_response = await self.geocoding_service.reverse_geocode(lat, lng, language)
-            
-            # Cache the result
-            if location_response.success:
-                await self.cache_service.set_location(lat, lng, language, location_response.dict())
-            
-            return self._format_clean_response(location_response.dict(), lat, lng, cached=False)
-            
+                return self._format_cached_response(cached_result, lat, lng)
+            return await self._geocode_uncached(lat, lng, language, deadline, detail)
+        
         except Exception as e:
-            return {
-                "success": False,
-                "error": {
-                    "code": "GEOCODING_ERROR",
-                    "message": str(e)
-                },
-                "coordinates": {"latitude": lat, "longitude": lng}
-            }
+            return self._format_exception_response(e, lat, lng)
+    
+    async def _geocode_uncached(self, lat, lng, language, deadline=None, detail=DetailLevel.STREET, writes=None):
+        """Geocode a cache miss and cache the result, or queue it on ``writes`` for one batched write"""
+        # Get location from geocoding service
+        location_response = await self.geocoding_service.reverse_geocode(lat, lng, language, deadline, detail)
+        
+        # Stale-while-revalidate needs a background task, which would not outlive
+        # this request's event loop, so stale entries are only used when providers fail
+        if not location_response.success and settings.CACHE_SERVE_STALE_ON_ERROR:
+            stale_result = await self.cache_service.get_location(lat, lng, language, detail, allow_stale=True)
+            if stale_result and stale_result.get("success"):
+                return self._format_clean_response(stale_result, lat, lng, cached=True)
+        
+        # Cache the result (offline answers are not worth caching); failures are
+        # cached briefly, so repeated bad points don't hammer the providers
+        if not location_response.success or location_response.data.metadata.source not in LOCAL_SOURCES:
+            if writes is None:
+                await self.cache_service.set_location(lat, lng, language, location_response.dict())
+            else:
+                writes.append((lat, lng, language, location_response.dict()))
+        
+        if not location_response.success:
+            return self._format_error_response(location_response.dict(), lat, lng)
+        return self._format_clean_response(location_response.dict(), lat, lng, cached=False)
+    
+    def _format_cached_response(self, cached_result, lat, lng):
+        """Format a cache hit, which may be a cached failure"""
+        if not cached_result.get("success"):
+            return self._format_error_response(cached_result, lat, lng)
+        return self._format_clean_response(cached_result, lat, lng, cached=True)
+    
+    def _format_exception_response(self, error, lat, lng):
+        return {
+            "success": False,
+            "error": {
+                "code": "GEOCODING_ERROR",
+                "message": str(error)
+            },
+            "coordinates": {"latitude": lat, "longitude": lng}
+        }
+    
+    def _format_error_response(self, response_data, lat, lng):
+        """Format a failed lookup, fresh or from the negative cache"""
+        return {
+            "success": False,
+            "error": response_data.get('error') or {
+                "code": "GEOCODING_FAILED",
+                "message": "All geocoding services failed"
+            },
+            "coordinates": {"latitude": lat, "longitude": lng}
+        }
     
     def _format_clean_response(self, response_data, lat, lng, cached=False):
         """Format a clean response with only essential data"""
@@ -202,31 +258,58 @@ class handler(BaseHTTPRequestHandler):
             "metadata": {
                 "source": metadata_info.get('source', 'unknown'),
                 "cached": cached,
+                "stale": metadata_info.get('stale', False),
+                "staleSeconds": metadata_info.get('staleSeconds'),
                 "processingTime": metadata_info.get('processingTime'),
                 "timestamp": datetime.utcnow()
             }
         }
     
-    async def _batch_geocode_async(self, locations, language):
-        """Async batch geocoding"""
-        results = []
+    async def _batch_geocode_async(self, locations, language, deadline=None, detail=DetailLevel.STREET):
+        """Async batch geocoding: cache hits first, then the misses concurrently.
+        
+        Cache reads and writes each take one backend round trip.
+        """
+        results = [None] * len(locations)
+        points = {}
         
-        for location in locations:
+        for i, location in enumerate(locations):
             try:
-                lat = float(location['latitude'])
-                lng = float(location['longitude'])
-                
-                result = await self._geocode_async(lat, lng, language)
-                results.append(result)
-                
+                points[i] = (float(location['latitude']), float(location['longitude']))
             except Exception as e:
-                results.append({
+                results[i] = {
                     "success": False,
                     "error": {
                         "code": "INVALID_LOCATION",
                         "message": str(e)
                     }
-                })
+                }
+        
+        cached_results = await self.cache_service.get_many(list(points.values()), language, detail)
+        misses = {}
+        for (i, (lat, lng)), cached_result in zip(points.items(), cached_results):
+            if cached_result:
+                results[i] = self._format_cached_response(cached_result, lat, lng)
+            else:
+                # Grouped by cache cell, so each cell is geocoded once
+                misses.setdefault(self.cache_service.generate_cache_key(lat, lng, language), []).append(i)
+        
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+        writes = []
+        
+        async def resolve_cell(indices):
+            lat, lng = points[indices[0]]
+            try:
+                async with semaphore:
+                    result = await self._geocode_uncached(lat, lng, language, deadline, detail, writes)
+            except Exception as e:
+                result = self._format_exception_response(e, lat, lng)
+            for i in indices:
+                results[i] = {**result, "coordinates": {"latitude": points[i][0], "longitude": points[i][1]}}
+        
+        # Misses are geocoded BATCH_MAX_CONCURRENCY at a time, in input order in the results
+        await asyncio.gather(*(resolve_cell(indices) for indices in misses.values()))
+        await self.cache_service.set_many(writes)
         
         successful = sum(1 for r in results if r.get('success', False))
         
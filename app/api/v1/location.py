@@ -1,13 +1,21 @@
 """Location API endpoints"""
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Set, Dict, Any, Tuple, AsyncIterator
+import asyncio
+import json
+import secrets
 import structlog
 
-from app.models.request import LocationRequest, BatchLocationRequest
+from app.models.request import LocationRequest, BatchLocationRequest, Coordinates, DetailLevel
 from app.models.response import LocationResponse, BatchLocationResponse, ErrorResponse
-from app.services.geocoding import GeocodingService
+from app.services.geocoding import GeocodingService, LOCAL_SOURCES
 from app.services.validation import ValidationService
 from app.services.cache import CacheService
+from app.services.singleflight import SingleFlight
+from app.services.batch_jobs import BatchJobManager, JobQueueFull, ACTIVE_STATES, job_summary
+from app.utils.deadline import Deadline
+from app.config import settings
 
 logger = structlog.get_logger()
 
@@ -25,50 +33,168 @@ router = APIRouter(
 geocoding_service = GeocodingService()
 validation_service = ValidationService()
 cache_service = CacheService()
+geocode_flight = SingleFlight()
+job_manager = BatchJobManager(geocoding_service, cache_service)
+
+# Strong references to background refreshes, so they are not garbage collected mid-flight
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def _cacheable(location_response: LocationResponse) -> bool:
+    """Whether a provider answer should be written to the cache.
+    
+    Offline answers are cheaper than a cache lookup, and admin-boundary ones
+    must not be served to street-level requests; stale entries served on error
+    are already cached. Failures are cached with a short negative TTL by error type.
+    """
+    if location_response.data is None:
+        return True
+    metadata = location_response.data.metadata
+    return not metadata.cached and metadata.source not in LOCAL_SOURCES
+
+
+async def _geocode_and_cache(
+    latitude: float, 
+    longitude: float, 
+    language: str, 
+    deadline: Optional[Deadline] = None,
+    detail: DetailLevel = DetailLevel.STREET,
+    write: bool = True
+) -> LocationResponse:
+    """Resolve a location through the providers and cache the result (unless ``write`` is off, for batched writes)"""
+    location_response = await geocoding_service.reverse_geocode(latitude, longitude, language, deadline, detail)
+    
+    # A usable address from before beats an error, and must not be overwritten by one
+    if not location_response.success and settings.CACHE_SERVE_STALE_ON_ERROR:
+        stale_result = await cache_service.get_location(latitude, longitude, language, detail, allow_stale=True)
+        if stale_result and stale_result.get("success"):
+            logger.warning("Geocoding failed, serving stale cache entry", lat=latitude, lng=longitude)
+            return LocationResponse(**stale_result)
+    
+    # Cache the result (convert to dict for caching)
+    if write and _cacheable(location_response):
+        await cache_service.set_location(
+            latitude,
+            longitude,
+            language,
+            location_response.dict()
+        )
+    return location_response
+
+
+async def _resolve_location(
+    latitude: float, 
+    longitude: float, 
+    language: str, 
+    deadline: Optional[Deadline] = None,
+    detail: DetailLevel = DetailLevel.STREET,
+    write: bool = True
+) -> LocationResponse:
+    """Geocode a cache miss, sharing one provider call between concurrent misses for the same cache key"""
+    flight_key = cache_service.generate_cache_key(latitude, longitude, language)
+    if detail != DetailLevel.STREET:
+        flight_key = f"{flight_key}:{detail.value}"
+    return await geocode_flight.do(
+        flight_key,
+        lambda: _geocode_and_cache(latitude, longitude, language, deadline, detail, write)
+    )
+
+
+async def _refresh_location(latitude: float, longitude: float, language: str, detail: DetailLevel) -> None:
+    """Re-geocode a stale entry; only a successful answer replaces it"""
+    try:
+        deadline = Deadline.from_ms(settings.MAX_RESPONSE_TIME_MS)
+        location_response = await geocoding_service.reverse_geocode(latitude, longitude, language, deadline, detail)
+        if location_response.success and location_response.data.metadata.source not in LOCAL_SOURCES:
+            await cache_service.set_location(latitude, longitude, language, location_response.dict())
+    except Exception as e:
+        logger.warning("Background cache refresh failed", error=str(e), lat=latitude, lng=longitude)
+
+
+def _refresh_in_background(latitude: float, longitude: float, language: str, detail: DetailLevel) -> None:
+    """Start a background refresh, joining one already running for the same cache key"""
+    flight_key = f"{cache_service.generate_cache_key(latitude, longitude, language)}:refresh"
+    task = asyncio.ensure_future(
+        geocode_flight.do(flight_key, lambda: _refresh_location(latitude, longitude, language, detail))
+    )
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def _serve_cached(
+    latitude: float, 
+    longitude: float, 
+    language: str, 
+    detail: DetailLevel,
+    cached_result: Dict[str, Any]
+) -> LocationResponse:
+    """Response for a cache hit, refreshing the entry in the background when it is
+    stale or, at random as it nears expiry, early (XFetch) so hot entries are
+    replaced before they expire instead of all missing at once.
+    """
+    response = LocationResponse(**cached_result)
+    if (response.data and response.data.metadata.stale) or cache_service.should_refresh_early(cached_result):
+        _refresh_in_background(latitude, longitude, language, detail)
+    return response
+
+
+async def _cached_location(
+    latitude: float, 
+    longitude: float, 
+    language: str, 
+    detail: DetailLevel = DetailLevel.STREET
+) -> Optional[LocationResponse]:
+    """Cached response, serving stale entries while they are refreshed when stale-while-revalidate is on"""
+    cached_result = await cache_service.get_location(
+        latitude,
+        longitude,
+        language,
+        detail,
+        allow_stale=settings.CACHE_STALE_WHILE_REVALIDATE
+    )
+    if not cached_result:
+        return None
+    return _serve_cached(latitude, longitude, language, detail, cached_result)
 
 
 @router.post("/reverse", response_model=LocationResponse)
-async def reverse_geocode(request: LocationRequest):
+async def reverse_geocode(request: LocationRequest, http_request: Request):
     """
     Reverse geocode a single GPS coordinate to get location information
     
     - **latitude**: GPS latitude coordinate (-90 to 90)
     - **longitude**: GPS longitude coordinate (-180 to 180)
     - **language**: Optional language code for the response (default: en)
+    - **detail**: `street` (default) or `locality` when city/state/country is enough
     """
     try:
         # Validate coordinates
         validation_service.validate_coordinates(request.latitude, request.longitude)
         
         # Check cache first
-        cached_result = await cache_service.get_location(
+        cached_result = await _cached_location(
             request.latitude, 
             request.longitude, 
-            request.language
+            request.language,
+            request.detail
         )
         
         if cached_result:
             logger.info("Cache hit", lat=request.latitude, lng=request.longitude)
-            return LocationResponse(**cached_result)
+            return cached_result
         
         # Get location from geocoding service
-        location_response = await geocoding_service.reverse_geocode(
-            request.latitude,
-            request.longitude,
-            request.language
-        )
-        
-        # Cache the result (convert to dict for caching)
-        await cache_service.set_location(
+        location_response = await _resolve_location(
             request.latitude,
             request.longitude,
             request.language,
-            location_response.dict()
+            getattr(http_request.state, "deadline", None),
+            request.detail
         )
         
         logger.info("Reverse geocoding successful", lat=request.latitude, lng=request.longitude)
         return location_response
-        
+    
     except ValueError as e:
         logger.warning("Validation error", error=str(e), lat=request.latitude, lng=request.longitude)
         raise HTTPException(status_code=400, detail=str(e))
@@ -78,53 +204,29 @@ async def reverse_geocode(request: LocationRequest):
 
 
 @router.post("/reverse/batch", response_model=BatchLocationResponse)
-async def batch_reverse_geocode(request: BatchLocationRequest):
+async def batch_reverse_geocode(request: BatchLocationRequest, http_request: Request):
     """
     Reverse geocode multiple GPS coordinates in a single request
     
     - **locations**: List of coordinate objects with latitude and longitude
     - **language**: Optional language code for all responses (default: en)
+    - **detail**: `street` (default) or `locality` when city/state/country is enough
     """
     try:
         if len(request.locations) > 100:  # Limit batch size
             raise HTTPException(status_code=400, detail="Batch size cannot exceed 100 locations")
         
-        results = []
+        deadline = getattr(http_request.state, "deadline", None)
+        results: List[Optional[LocationResponse]] = [None] * len(request.locations)
+        valid = []
         for i, location in enumerate(request.locations):
             try:
                 # Validate coordinates
                 validation_service.validate_coordinates(location.latitude, location.longitude)
-                
-                # Check cache first
-                cached_result = await cache_service.get_location(
-                    location.latitude,
-                    location.longitude,
-                    request.language
-                )
-                
-                if cached_result:
-                    results.append(LocationResponse(**cached_result))
-                else:
-                    # Get location from geocoding service
-                    location_response = await geocoding_service.reverse_geocode(
-                        location.latitude,
-                        location.longitude,
-                        request.language
-                    )
-                    
-                    # Cache the result (convert to dict for caching)
-                    await cache_service.set_location(
-                        location.latitude,
-                        location.longitude,
-                        request.language,
-                        location_response.dict()
-                    )
-                    
-                    results.append(location_response)
-                    
+                valid.append(i)
             except ValueError as e:
                 # Add error result for invalid coordinates
-                results.append(LocationResponse(
+                results[i] = LocationResponse(
                     success=False,
                     error={
                         "code": "INVALID_COORDINATES",
@@ -134,20 +236,69 @@ async def batch_reverse_geocode(request: BatchLocationRequest):
                         "latitude": location.latitude,
                         "longitude": location.longitude
                     }
-                ))
-            except Exception as e:
-                # Add error result for geocoding failure
-                results.append(LocationResponse(
-                    success=False,
-                    error={
-                        "code": "GEOCODING_ERROR",
-                        "message": "Failed to process location"
-                    },
-                    coordinates={
-                        "latitude": location.latitude,
-                        "longitude": location.longitude
-                    }
-                ))
+                )
+        
+        # Check cache first, for the whole batch in one backend round trip
+        cached_results = await cache_service.get_many(
+            [(request.locations[i].latitude, request.locations[i].longitude) for i in valid],
+            request.language,
+            request.detail,
+            allow_stale=settings.CACHE_STALE_WHILE_REVALIDATE
+        )
+        
+        # Misses are grouped by cache cell, so each cell is geocoded once
+        misses: Dict[Any, List[int]] = {}
+        for i, cached_result in zip(valid, cached_results):
+            location = request.locations[i]
+            if not cached_result:
+                misses.setdefault(
+                    cache_service.generate_cache_key(location.latitude, location.longitude, request.language), []
+                ).append(i)
+                continue
+            try:
+                results[i] = _serve_cached(
+                    location.latitude,
+                    location.longitude,
+                    request.language,
+                    request.detail,
+                    cached_result
+                )
+            except Exception:
+                results[i] = _batch_error(location)
+        
+        # Geocode the misses concurrently, BATCH_MAX_CONCURRENCY at a time (providers
+        # apply their own limits on top); fresh answers are cached together afterwards
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+        writes = []
+        
+        async def resolve_cell(indices: List[int]) -> None:
+            location = request.locations[indices[0]]
+            try:
+                async with semaphore:
+                    location_response = await _resolve_location(
+                        location.latitude,
+                        location.longitude,
+                        request.language,
+                        deadline,
+                        request.detail,
+                        write=False
+                    )
+            except Exception:
+                for i in indices:
+                    results[i] = _batch_error(request.locations[i])
+                return
+            
+            if _cacheable(location_response):
+                writes.append((location.latitude, location.longitude, request.language, location_response.dict()))
+            # Points sharing the cell share the answer, but each keeps its own coordinates
+            for i in indices:
+                results[i] = location_response.model_copy(update={"coordinates": {
+                    "latitude": request.locations[i].latitude,
+                    "longitude": request.locations[i].longitude
+                }})
+        
+        await asyncio.gather(*(resolve_cell(indices) for indices in misses.values()))
+        await cache_service.set_many(writes)
         
         successful_results = len([r for r in results if r.success])
         logger.info("Batch geocoding completed", 
@@ -160,7 +311,7 @@ async def batch_reverse_geocode(request: BatchLocationRequest):
             successful_requests=successful_results,
             results=results
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -168,12 +319,256 @@ async def batch_reverse_geocode(request: BatchLocationRequest):
         raise HTTPException(status_code=500, detail="Failed to process batch request")
 
 
+def _batch_error(location: Coordinates) -> LocationResponse:
+    """Error result for a batch location that could not be processed"""
+    return LocationResponse(
+        success=False,
+        error={
+            "code": "GEOCODING_ERROR",
+            "message": "Failed to process location"
+        },
+        coordinates={
+            "latitude": location.latitude,
+            "longitude": location.longitude
+        }
+    )
+
+
+def _parse_job_line(line: bytes, line_number: int) -> Tuple[float, float]:
+    """Validated (lat, lng) of one NDJSON upload line"""
+    try:
+        location = json.loads(line)
+        point = (float(location["latitude"]), float(location["longitude"]))
+        validation_service.validate_coordinates(*point)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid location on line {line_number}: {e}")
+    return point
+
+
+async def _read_job_points(http_request: Request) -> AsyncIterator[List[Tuple[float, float]]]:
+    """Validated (lat, lng) points of a job upload, in chunks.
+    
+    NDJSON uploads are parsed as they stream in; columnar JSON is read whole.
+    Raises ValueError describing the first bad location.
+    """
+    content_type = http_request.headers.get("content-type", "")
+    chunk: List[Tuple[float, float]] = []
+    
+    if "ndjson" in content_type or "jsonl" in content_type:
+        buffer = b""
+        line_number = 0
+        async for body in http_request.stream():
+            lines = (buffer + body).split(b"\n")
+            buffer = lines.pop()
+            for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                chunk.append(_parse_job_line(line, line_number))
+                if len(chunk) >= settings.JOB_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        if buffer.strip():
+            chunk.append(_parse_job_line(buffer, line_number + 1))
+    else:
+        try:
+            columns = await http_request.json()
+            latitudes, longitudes = columns["latitude"], columns["longitude"]
+        except (ValueError, KeyError, TypeError):
+            raise ValueError('Expected NDJSON or a JSON object with "latitude" and "longitude" arrays')
+        if len(latitudes) != len(longitudes):
+            raise ValueError("latitude and longitude arrays must have the same length")
+        for i, (lat, lng) in enumerate(zip(latitudes, longitudes)):
+            try:
+                point = (float(lat), float(lng))
+                validation_service.validate_coordinates(*point)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Invalid location at index {i}: {e}")
+            chunk.append(point)
+            if len(chunk) >= settings.JOB_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+    
+    if chunk:
+        yield chunk
+
+
+@router.post("/jobs", status_code=202)
+async def submit_batch_job(
+    http_request: Request,
+    language: str = Query(default="en"),
+    detail: DetailLevel = Query(default=DetailLevel.STREET)
+):
+    """
+    Submit a large set of coordinates for asynchronous reverse geocoding
+    
+    - **body**: NDJSON (`application/x-ndjson`), one `{"latitude": ..., "longitude": ...}` per line,
+      or columnar JSON `{"latitude": [...], "longitude": [...]}`
+    - **language**: Optional language code for all responses (default: en)
+    - **detail**: `street` (default) or `locality`
+    
+    Poll progress at `/jobs/{jobId}` and stream results from `/jobs/{jobId}/results`.
+    """
+    try:
+        job_id = await job_manager.create_job(language, detail)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later", headers={"Retry-After": "30"})
+    
+    total = 0
+    try:
+        async for points in _read_job_points(http_request):
+            if total + len(points) > settings.JOB_MAX_POINTS:
+                raise ValueError(f"Jobs cannot exceed {settings.JOB_MAX_POINTS} locations")
+            await job_manager.add_points(job_id, total, points)
+            total += len(points)
+        if not total:
+            raise ValueError("No locations in upload")
+        await job_manager.submit(job_id)
+    except ValueError as e:
+        await job_manager.discard(job_id)
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later", headers={"Retry-After": "30"})
+    except Exception as e:
+        await job_manager.discard(job_id)
+        logger.error("Batch job upload failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to submit batch job")
+    
+    return {"jobId": job_id, "status": "queued", "total": total}
+
+
+@router.get("/jobs/{job_id}")
+async def get_batch_job(job_id: str):
+    """Progress of a batch job"""
+    job = await job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_summary(job)
+
+
+@router.get("/jobs/{job_id}/results")
+async def stream_batch_job_results(
+    job_id: str,
+    after: int = Query(default=-1, ge=-1),
+    follow: bool = Query(default=True)
+):
+    """
+    Stream a batch job's results as NDJSON, in input order, each with its `index`
+    
+    - **after**: Resume after this index (default: from the start)
+    - **follow**: Keep the stream open until the job finishes (default: true);
+      otherwise return the results finished so far
+    """
+    if await job_manager.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def lines() -> AsyncIterator[str]:
+        last = after
+        done = False
+        while True:
+            rows = await job_manager.read_results(job_id, last, settings.JOB_CHUNK_SIZE)
+            for index, result in rows:
+                yield result + "\n"
+                last = index
+            if rows:
+                continue
+            if done:
+                break
+            # Results are committed before the job is marked finished, so one
+            # more read after seeing it finished picks up the last of them
+            job = await job_manager.get_job(job_id)
+            done = not follow or job is None or job["status"] not in ACTIVE_STATES
+            if not done:
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)) -> None:
+    """Guard for cache administration; disabled unless ADMIN_API_KEY is configured"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Cache administration is disabled")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+@router.delete("/cache", dependencies=[Depends(require_admin)])
+async def purge_cache():
+    """Purge every cached location, including in-process copies on all workers"""
+    await cache_service.purge()
+    return {"purged": True}
+
+
+@router.delete("/cache/entry", dependencies=[Depends(require_admin)])
+async def purge_cache_entry(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    language: str = Query(default="en")
+):
+    """
+    Purge one cached location on all workers
+    
+    - **latitude** / **longitude**: Coordinates whose cache cell should be dropped
+    - **language**: Language of the cached entry (default: en)
+    """
+    deleted = await cache_service.delete_location(latitude, longitude, language)
+    return {
+        "cacheKey": cache_service.describe_key(cache_service.generate_cache_key(latitude, longitude, language)),
+        "deleted": deleted
+    }
+
+
+@router.post("/cache/snapshot", dependencies=[Depends(require_admin)])
+async def export_cache_snapshot():
+    """Export the cache to a memory-mapped snapshot file for warm cold starts"""
+    path = settings.CACHE_SNAPSHOT_EXPORT_PATH or settings.CACHE_SNAPSHOT_PATH
+    if not path:
+        raise HTTPException(status_code=400, detail="No snapshot path configured")
+    try:
+        entries = await cache_service.export_snapshot(path)
+    except Exception as e:
+        logger.error("Cache snapshot export failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to export cache snapshot")
+    return {"path": path, "entries": entries}
+
+
+@router.post("/cache/refresh", response_model=LocationResponse, dependencies=[Depends(require_admin)])
+async def refresh_cache_entry(request: LocationRequest, http_request: Request):
+    """Re-geocode a location past the cache, store the fresh result and drop stale copies on all workers"""
+    validation_service.validate_coordinates(request.latitude, request.longitude)
+    location_response = await _geocode_and_cache(
+        request.latitude,
+        request.longitude,
+        request.language,
+        getattr(http_request.state, "deadline", None),
+        request.detail
+    )
+    await cache_service.invalidate_location(request.latitude, request.longitude, request.language)
+    return location_response
+
+
+@router.get("/providers")
+async def provider_ranking(country_code: Optional[str] = Query(default=None, pattern=r"^[A-Za-z]{2}$")):
+    """
+    Inspect the current provider ranking and the statistics behind it
+    
+    - **country_code**: Optional ISO country code to rank with country-level statistics
+    """
+    country = country_code.upper() if country_code else None
+    return {
+        "adaptive": settings.ADAPTIVE_ORDERING_ENABLED,
+        "countryCode": country,
+        "order": geocoding_service._provider_chain(country),
+        "ranking": geocoding_service.rank_providers(country)
+    }
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint for the location service"""
     try:
         # Test cache connection
-        await cache_service.health_check()
+        cache_up = await cache_service.health_check()
         
         # Test geocoding service
         await geocoding_service.health_check()
@@ -181,9 +576,11 @@ async def health_check():
         return {
             "status": "healthy",
             "services": {
-                "cache": "up",
-                "geocoding": "up"
-            }
+                "cache": "up" if cache_up else "down",
+                "geocoding": "degraded" if geocoding_service.is_degraded() else "up"
+            },
+            "providers": geocoding_service.provider_status(),
+            "cache": cache_service.stats()
         }
     except Exception as e:
         logger.error("Health check failed", error=str(e))
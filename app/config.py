@@ -1,11 +1,12 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # API Keys
     GOOGLE_MAPS_API_KEY: Optional[str] = None
     MAPBOX_ACCESS_TOKEN: Optional[str] = None
+    ADMIN_API_KEY: Optional[str] = None  # Enables the cache admin endpoints (X-Admin-Key header)
     
     # Service Configuration
     APP_NAME: str = "Mini Location Service"
@@ -14,9 +15,52 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     ENVIRONMENT: str = "development"
     
-    # Cache Configuration (In-memory for serverless)
+    # Cache Configuration (In-memory for serverless, Redis to share across instances)
+    CACHE_BACKEND: str = "memory"  # "memory", "redis" or "shm" (shared by the workers on one host)
+    REDIS_URL: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_TIMEOUT_MS: int = 100  # Slower cache operations degrade to a miss
+    CACHE_SHM_PATH: str = "/dev/shm/location-cache"
+    CACHE_SHM_SLOTS: int = 131072
+    CACHE_SHM_SLOT_BYTES: int = 2048  # Entries larger than a slot (minus a 64-byte header) are not cached
+    CACHE_SHM_PROBE: int = 8  # Slots a key may occupy; a full window evicts the entry closest to expiry
+    CACHE_L1_ENABLED: bool = True  # In-process L1 in front of Redis
+    CACHE_L1_TTL_SECONDS: int = 60  # Bounds how stale an L1 copy can get if an invalidation is missed
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L1_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_INVALIDATION_CHANNEL: str = "location-cache:invalidate"
     CACHE_TTL_DEFAULT: int = 86400  # 24 hours
     CACHE_PRECISION: int = 4  # Coordinate precision for caching
+    CACHE_LOCALITY_PRECISION: int = 2  # Coarse cells (~1 km) for city/state/country entries
+    CACHE_MAX_ENTRIES: int = 100000
+    CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Approximate in-memory budget
+    CACHE_EVICTION_POLICY: str = "lru"  # "lru" or "tinylfu" (W-TinyLFU)
+    CACHE_SERIALIZER: str = "orjson"  # "orjson", "json" or "msgpack" (needs msgpack installed)
+    CACHE_COMPRESSION: Optional[str] = None  # "zstd" (needs zstandard installed)
+    CACHE_COMPRESSION_LEVEL: int = 3
+    CACHE_COMPRESSION_MIN_BYTES: int = 256  # Smaller entries are stored uncompressed
+    CACHE_ZSTD_DICTIONARY_PATH: Optional[str] = None  # Trained with cache_codec.train_dictionary
+    CACHE_EXPIRY_INTERVAL_SECONDS: float = 1.0  # Background expiry sweep interval
+    CACHE_EXPIRY_SLICE: int = 500  # Max entries reclaimed before yielding to the event loop
+    CACHE_EXPIRY_WRITE_SLICE: int = 8  # Entries reclaimed opportunistically on each write
+    CACHE_SNAPSHOT_PATH: Optional[str] = None  # Memory-mapped snapshot consulted on cache misses
+    CACHE_SNAPSHOT_EXPORT_PATH: Optional[str] = None  # Where the admin export writes (defaults to CACHE_SNAPSHOT_PATH)
+    CACHE_NEGATIVE_TTL_SECONDS: int = 60  # Failed lookups during provider outages (0 disables)
+    CACHE_NO_RESULT_TTL_SECONDS: int = 86400  # Points where every provider found no address (e.g. at sea)
+    CACHE_STALE_GRACE_SECONDS: int = 86400  # Entries are kept this long past their TTL
+    CACHE_STALE_WHILE_REVALIDATE: bool = False  # Serve stale entries at once and refresh in the background
+    CACHE_SERVE_STALE_ON_ERROR: bool = True  # Serve a stale entry when every provider fails
+    CACHE_EARLY_REFRESH_ENABLED: bool = True  # XFetch probabilistic refresh of entries nearing expiry
+    CACHE_EARLY_REFRESH_BETA: float = 1.0  # > 1 refreshes earlier, < 1 later
+    CACHE_PROXIMITY_ENABLED: bool = False  # Serve the nearest cached result within a place-type radius
+    CACHE_PROXIMITY_RADII_M: Dict[str, float] = {
+        "street_address": 15,
+        "establishment": 15,
+        "point_of_interest": 15,
+        "locality": 500,
+        "administrative": 2000
+    }
+    CACHE_PROXIMITY_MAX_ENTRIES: int = 100000
     
     # Rate Limiting
     MAX_REQUESTS_PER_MINUTE: int = 1000
@@ -24,7 +68,74 @@ class Settings(BaseSettings):
     
     # Timeouts (Adjusted for serverless)
     EXTERNAL_API_TIMEOUT: int = 10
-    MAX_RESPONSE_TIME_MS: int = 5000
+    MAX_RESPONSE_TIME_MS: int = 5000  # Per-request deadline shared by the whole provider chain
+    BATCH_MAX_RESPONSE_TIME_MS: int = 30000
+    BATCH_MAX_CONCURRENCY: int = 10  # Cache misses of one batch geocoded at the same time
+    
+    # Asynchronous batch jobs, checkpointed in SQLite (not available in the serverless handler)
+    JOBS_DB_PATH: str = "location-jobs.db"
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 20  # Jobs waiting for a worker before submissions are refused
+    JOB_CHUNK_SIZE: int = 500  # Points geocoded and checkpointed together
+    JOB_CONCURRENCY: int = 10  # Cache misses of one chunk geocoded at the same time
+    JOB_MAX_POINTS: int = 5000000
+    JOB_POINT_TIMEOUT_MS: int = 30000  # Budget for one point, counted from when it starts
+    JOB_MAX_ATTEMPTS: int = 8  # Attempts for a point that keeps failing transiently before its failure is saved
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0
+    JOB_RETRY_MAX_BACKOFF_SECONDS: float = 300.0
+    JOB_LEASE_SECONDS: float = 30.0  # Processes sharing JOBS_DB_PATH run each job once; an unrenewed lease lets another take it over
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0  # How often a following result stream checks for new results
+    
+    # Outbound HTTP connection pools (one per provider)
+    HTTP2_ENABLED: bool = True
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Hedged provider requests: start the next provider when the current one
+    # is slower than its recent latency percentile
+    HEDGING_ENABLED: bool = False
+    HEDGE_DELAY_PERCENTILE: float = 95.0
+    HEDGE_DELAY_DEFAULT_MS: int = 1000  # Used until a provider has enough samples
+    HEDGE_DELAY_MIN_MS: int = 50
+    HEDGE_MIN_SAMPLES: int = 20
+    LATENCY_WINDOW_SIZE: int = 200
+    
+    # Per-provider circuit breakers
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_FAILURE_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_SLOW_CALL_THRESHOLD_MS: int = 3000
+    CIRCUIT_SLOW_CALL_RATE_THRESHOLD: float = 0.8
+    CIRCUIT_WINDOW_SIZE: int = 20
+    CIRCUIT_MIN_CALLS: int = 5
+    CIRCUIT_OPEN_COOLDOWN_SECONDS: int = 30
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 2
+    
+    # Adaptive provider ordering. Providers are only reordered within the same
+    # priority tier (lower tiers are always tried first); within a tier they are
+    # ranked by expected latency plus cost * PROVIDER_COST_WEIGHT_MS.
+    ADAPTIVE_ORDERING_ENABLED: bool = False
+    ADAPTIVE_PER_COUNTRY: bool = True
+    ADAPTIVE_MIN_SAMPLES: int = 20
+    ADAPTIVE_EXPLORATION_RATE: float = 0.05  # Share of requests led by a lower-ranked provider of the same tier
+    PROVIDER_PRIORITY_TIERS: Dict[str, int] = {"google_maps": 0, "mapbox": 0, "nominatim": 1}
+    PROVIDER_COSTS: Dict[str, float] = {"google_maps": 5.0, "mapbox": 0.75, "nominatim": 0.0}  # Per 1000 requests
+    PROVIDER_COST_WEIGHT_MS: float = 0.0
+    
+    # Outbound rate limits per provider (token bucket: requests/second and burst size)
+    PROVIDER_RATE_LIMITS: Dict[str, float] = {"google_maps": 50.0, "mapbox": 10.0, "nominatim": 1.0}
+    PROVIDER_RATE_BURST: Dict[str, int] = {"google_maps": 50, "mapbox": 10, "nominatim": 1}
+    # Concurrent in-flight calls per provider (unset: unlimited)
+    PROVIDER_MAX_CONCURRENCY: Dict[str, int] = {"google_maps": 20, "mapbox": 10, "nominatim": 1}
+    RATE_LIMIT_MAX_WAITERS: int = 50
+    RATE_LIMIT_MAX_WAIT_MS: int = 2000
+    
+    # Offline admin-boundary lookups (GeoJSON FeatureCollection with admin_level/name properties)
+    ADMIN_BOUNDARIES_PATH: Optional[str] = None
+    
+    # Offline street-level lookups (OpenAddresses-style CSV, needs NumPy)
+    ADDRESS_POINTS_PATH: Optional[str] = None
+    ADDRESS_POINTS_MAX_DISTANCE_M: float = 50.0
     
     # Supported Countries
     SUPPORTED_COUNTRIES: List[str] = ["IN", "US", "GB", "CA", "AU"]
@@ -4,24 +4,41 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 import structlog
 
 from app.config import settings
-from app.api.v1.location import router as location_router
+from app.api.v1.location import router as location_router, geocoding_service, cache_service, job_manager
 from app.utils.logging import configure_logging
+from app.utils.deadline import Deadline
 
 # Configure structured logging
 configure_logging()
 logger = structlog.get_logger()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown"""
+    await geocoding_service.startup()
+    await cache_service.startup()
+    await job_manager.start()
+    try:
+        yield
+    finally:
+        await job_manager.stop()
+        await cache_service.stop_expiry()
+        await cache_service.close()
+        await geocoding_service.close()
+
 # Create FastAPI app (simplified for serverless)
 app = FastAPI(
     title="Mini Location Service",
     description="High-performance location microservice for GPS coordinate reverse geocoding",
     version=settings.APP_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -43,6 +60,10 @@ async def add_request_id_and_timing(request: Request, call_next):
     # Add request ID to headers
     request.state.request_id = request_id
     
+    # Response time budget, propagated down to the geocoding providers
+    budget_ms = settings.BATCH_MAX_RESPONSE_TIME_MS if request.url.path.endswith("/batch") else settings.MAX_RESPONSE_TIME_MS
+    request.state.deadline = Deadline.from_ms(budget_ms)
+    
     # Process request
     response = await call_next(request)
     
@@ -122,7 +143,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             },
             "timestamp": datetime.utcnow().isoformat(),
             "requestId": getattr(request.state, 'request_id', None)
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
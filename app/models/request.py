@@ -1,6 +1,11 @@
 from pydantic import BaseModel, validator, Field
 from typing import Optional, List
 from datetime import datetime
+from enum import Enum
+
+class DetailLevel(str, Enum):
+    STREET = "street"      # Full address, street level
+    LOCALITY = "locality"  # City / district / state / country is enough
 
 class Coordinates(BaseModel):
     latitude: float = Field(..., ge=-90, le=90)
@@ -10,7 +15,9 @@ class LocationRequest(BaseModel):
     latitude: float = Field(..., ge=-90, le=90)
     longitude: float = Field(..., ge=-180, le=180)
     language: str = Field(default="en", pattern=r"^[a-z]{2}$")
+    detail: DetailLevel = DetailLevel.STREET
 
 class BatchLocationRequest(BaseModel):
     locations: List[Coordinates] = Field(..., max_items=100)
-    language: str = Field(default="en", pattern=r"^[a-z]{2}$")
\ No newline at end of file
+    language: str = Field(default="en", pattern=r"^[a-z]{2}$")
+    detail: DetailLevel = DetailLevel.STREET
\ No newline at end of file
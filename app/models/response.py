@@ -52,6 +52,8 @@ class Metadata(BaseModel):
     source: str
     processingTime: str
     cached: bool
+    stale: bool = False  # Served from cache past its TTL
+    staleSeconds: Optional[int] = None
     lastUpdated: datetime
 
 class LocationData(BaseModel):
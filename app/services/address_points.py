@@ -0,0 +1,180 @@
+"""Offline nearest-address lookup over a local address-point dataset"""
+import csv
+import math
+from typing import Optional, Dict, Any, List, Tuple
+import structlog
+from app.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the index is disabled without NumPy
+    np = None
+
+logger = structlog.get_logger()
+
+EARTH_RADIUS_M = 6371008.8
+
+# OpenAddresses column -> address component
+ADDRESS_COLUMNS = {
+    "NUMBER": "houseNumber",
+    "STREET": "street",
+    "UNIT": "buildingName",
+    "CITY": "city",
+    "DISTRICT": "district",
+    "REGION": "state",
+    "POSTCODE": "pincode"
+}
+
+
+def to_unit_vectors(lat, lng):
+    """Project lat/lng (degrees) onto the unit sphere so Euclidean distance orders like great-circle distance"""
+    lat_rad = np.radians(lat)
+    lng_rad = np.radians(lng)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lng_rad), cos_lat * np.sin(lng_rad), np.sin(lat_rad)))
+
+
+def chord_to_meters(chord: float) -> float:
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, chord / 2))
+
+
+def meters_to_chord(meters: float) -> float:
+    return 2 * math.sin(min(math.pi / 2, meters / (2 * EARTH_RADIUS_M)))
+
+
+class KDTree:
+    """Static 3-d KD-tree over a NumPy point array with vectorized leaf scans.
+    
+    Points are reordered so each node covers a contiguous slice; leaves of up to
+    ``leaf_size`` points are scanned with a single NumPy distance computation.
+    """
+    
+    def __init__(self, points, leaf_size: int = 32):
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(points))
+        self.points = np.asarray(points, dtype=np.float64)
+        # Node: [start, end, axis, split, left, right]; axis == -1 marks a leaf
+        self._nodes: List[list] = []
+        if len(points):
+            self._build(0, len(points))
+            self.points = self.points[self.order]
+    
+    def _build(self, start: int, end: int) -> int:
+        node_id = len(self._nodes)
+        self._nodes.append([start, end, -1, 0.0, -1, -1])
+        if end - start <= self.leaf_size:
+            return node_id
+        
+        segment = self.order[start:end]
+        coords = self.points[segment]
+        axis = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+        mid = (end - start) // 2
+        partition = np.argpartition(coords[:, axis], mid)
+        self.order[start:end] = segment[partition]
+        split = float(self.points[self.order[start + mid], axis])
+        
+        left = self._build(start, start + mid)
+        right = self._build(start + mid, end)
+        self._nodes[node_id][2:] = [axis, split, left, right]
+        return node_id
+    
+    def nearest(self, query, max_distance: float = math.inf) -> Optional[Tuple[int, float]]:
+        """Index (into the original input) and Euclidean distance of the nearest point within max_distance"""
+        if not self._nodes:
+            return None
+        best_index, best_distance = -1, max_distance
+        stack = [(0, 0.0)]
+        while stack:
+            node_id, bound = stack.pop()
+            if bound > best_distance:
+                continue
+            start, end, axis, split, left, right = self._nodes[node_id]
+            if axis == -1:
+                distances = np.sqrt(((self.points[start:end] - query) ** 2).sum(axis=1))
+                position = int(np.argmin(distances))
+                if distances[position] <= best_distance:
+                    best_index, best_distance = start + position, float(distances[position])
+                continue
+            
+            offset = query[axis] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            # Visit the near side first (pushed last); the far side is skipped
+            # once a closer point than its splitting plane has been found
+            stack.append((far, abs(offset)))
+            stack.append((near, bound))
+        
+        if best_index < 0:
+            return None
+        return int(self.order[best_index]), best_distance
+
+
+class AddressPointIndex:
+    """Local address points (OpenAddresses-style CSV) for street-level reverse geocoding"""
+    
+    def __init__(self, coordinates: List[Tuple[float, float]], attributes: List[Tuple[Optional[str], ...]]):
+        self._attributes = attributes
+        lat = np.array([point[0] for point in coordinates], dtype=np.float64)
+        lng = np.array([point[1] for point in coordinates], dtype=np.float64)
+        self._tree = KDTree(to_unit_vectors(lat, lng))
+    
+    @classmethod
+    def from_csv(cls, path: str) -> "AddressPointIndex":
+        """Load an OpenAddresses-style CSV (LON, LAT, NUMBER, STREET, UNIT, CITY, DISTRICT, REGION, POSTCODE)"""
+        coordinates, attributes = [], []
+        columns = list(ADDRESS_COLUMNS)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                row = {key.upper(): value for key, value in row.items() if key}
+                try:
+                    coordinates.append((float(row["LAT"]), float(row["LON"])))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                attributes.append(tuple((row.get(column) or None) for column in columns))
+        return cls(coordinates, attributes)
+    
+    @property
+    def size(self) -> int:
+        return len(self._attributes)
+    
+    def lookup(self, lat: float, lng: float, max_distance_m: float) -> Optional[Dict[str, Any]]:
+        """Nearest address point within max_distance_m, or None"""
+        query = to_unit_vectors(np.array([lat]), np.array([lng]))[0]
+        match = self._tree.nearest(query, meters_to_chord(max_distance_m))
+        if match is None:
+            return None
+        
+        index, chord = match
+        components = {
+            component: value
+            for component, value in zip(ADDRESS_COLUMNS.values(), self._attributes[index])
+            if value
+        }
+        return {
+            "components": components,
+            "distanceMeters": round(chord_to_meters(chord), 1)
+        }
+
+
+# Loaded once per process and shared, like the in-memory cache store
+_address_index: Optional[AddressPointIndex] = None
+_address_index_loaded = False
+
+def get_address_point_index() -> Optional[AddressPointIndex]:
+    """Lazily load the configured address-point dataset; None when not configured, unreadable or NumPy is missing"""
+    global _address_index, _address_index_loaded
+    if _address_index_loaded:
+        return _address_index
+    
+    _address_index_loaded = True
+    if not settings.ADDRESS_POINTS_PATH:
+        return None
+    if np is None:
+        logger.warning("ADDRESS_POINTS_PATH is set but NumPy is not installed; address points disabled")
+        return None
+    try:
+        _address_index = AddressPointIndex.from_csv(settings.ADDRESS_POINTS_PATH)
+        logger.info("Address points loaded", path=settings.ADDRESS_POINTS_PATH, points=_address_index.size)
+    except Exception as e:
+        logger.error("Failed to load address points", path=settings.ADDRESS_POINTS_PATH, error=str(e))
+    return _address_index
@@ -0,0 +1,219 @@
+"""Offline admin-boundary reverse geocoding (country / state / district / city)"""
+import json
+import math
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+import structlog
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# OSM-style admin_level -> address component
+ADMIN_LEVELS = {
+    2: "country",
+    4: "state",
+    5: "district",
+    6: "district",
+    7: "city",
+    8: "city"
+}
+
+# Values accepted in an explicit ``level`` property
+LEVEL_NAMES = ("country", "state", "district", "city")
+
+BBox = Tuple[float, float, float, float]
+Ring = List[Tuple[float, float]]
+
+
+class STRtree:
+    """Static R-tree bulk-loaded with Sort-Tile-Recursive packing"""
+    
+    def __init__(self, items: List[Tuple[BBox, Any]], node_capacity: int = 16):
+        self.node_capacity = node_capacity
+        level = [(*bbox, payload) for bbox, payload in items]
+        self._height = 0
+        while len(level) > node_capacity:
+            level = self._pack(level)
+            self._height += 1
+        self._root = level
+        self.size = len(items)
+    
+    def _pack(self, entries: List[tuple]) -> List[tuple]:
+        capacity = self.node_capacity
+        node_count = math.ceil(len(entries) / capacity)
+        slice_size = math.ceil(math.sqrt(node_count)) * capacity
+        
+        entries = sorted(entries, key=lambda e: e[0] + e[2])
+        nodes = []
+        for i in range(0, len(entries), slice_size):
+            strip = sorted(entries[i:i + slice_size], key=lambda e: e[1] + e[3])
+            for j in range(0, len(strip), capacity):
+                group = strip[j:j + capacity]
+                nodes.append((
+                    min(e[0] for e in group),
+                    min(e[1] for e in group),
+                    max(e[2] for e in group),
+                    max(e[3] for e in group),
+                    group
+                ))
+        return nodes
+    
+    def query_point(self, x: float, y: float) -> Iterator[Any]:
+        """Yield the payload of every item whose bounding box contains (x, y)"""
+        stack = [(self._root, self._height)]
+        while stack:
+            entries, depth = stack.pop()
+            for entry in entries:
+                if entry[0] <= x <= entry[2] and entry[1] <= y <= entry[3]:
+                    if depth == 0:
+                        yield entry[4]
+                    else:
+                        stack.append((entry[4], depth - 1))
+
+
+def point_in_ring(x: float, y: float, ring: Ring) -> bool:
+    """Ray-casting point-in-polygon test for a single closed ring"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(x: float, y: float, rings: List[Ring]) -> bool:
+    """Inside the outer ring and outside every hole"""
+    if not point_in_ring(x, y, rings[0]):
+        return False
+    return not any(point_in_ring(x, y, hole) for hole in rings[1:])
+
+
+class AdminBoundary:
+    """One admin area with its names and the codes it carries"""
+    
+    __slots__ = ("level", "properties", "area")
+    
+    def __init__(self, level: str, properties: Dict[str, Any], area: float):
+        self.level = level
+        self.properties = properties
+        self.area = area
+    
+    def name(self, language: str) -> Optional[str]:
+        return self.properties.get(f"name:{language}") or self.properties.get("name")
+
+
+class AdminBoundaryIndex:
+    """Admin boundary polygons behind an R-tree, answering lookups without network calls"""
+    
+    def __init__(self, features: List[Dict[str, Any]]):
+        items = []
+        for feature in features:
+            level = self._feature_level(feature.get("properties") or {})
+            if level is None:
+                continue
+            polygons = self._feature_polygons(feature.get("geometry") or {})
+            if not polygons:
+                continue
+            boundary = AdminBoundary(level, feature["properties"], sum(self._bbox_area(p[0]) for p in polygons))
+            for rings in polygons:
+                items.append((self._ring_bbox(rings[0]), (boundary, rings)))
+        self._tree = STRtree(items)
+    
+    @classmethod
+    def from_geojson(cls, path: str) -> "AdminBoundaryIndex":
+        """Load a GeoJSON FeatureCollection (e.g. converted from shapefiles with ogr2ogr)"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("features", []))
+    
+    @property
+    def size(self) -> int:
+        return self._tree.size
+    
+    @staticmethod
+    def _feature_level(properties: Dict[str, Any]) -> Optional[str]:
+        level = properties.get("level")
+        if level in LEVEL_NAMES:
+            return level
+        try:
+            return ADMIN_LEVELS.get(int(properties.get("admin_level")))
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _feature_polygons(geometry: Dict[str, Any]) -> List[List[Ring]]:
+        coordinates = geometry.get("coordinates") or []
+        if geometry.get("type") == "Polygon":
+            polygons = [coordinates]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = coordinates
+        else:
+            return []
+        return [
+            [[(point[0], point[1]) for point in ring] for ring in polygon]
+            for polygon in polygons if polygon and polygon[0]
+        ]
+    
+    @staticmethod
+    def _ring_bbox(ring: Ring) -> BBox:
+        xs = [point[0] for point in ring]
+        ys = [point[1] for point in ring]
+        return min(xs), min(ys), max(xs), max(ys)
+    
+    @classmethod
+    def _bbox_area(cls, ring: Ring) -> float:
+        minx, miny, maxx, maxy = cls._ring_bbox(ring)
+        return (maxx - minx) * (maxy - miny)
+    
+    def lookup(self, lat: float, lng: float, language: str = "en") -> Optional[Dict[str, Any]]:
+        """Admin components containing the point, or None if no boundary does.
+        
+        When several boundaries of one kind contain the point, the smallest wins.
+        """
+        matches: Dict[str, AdminBoundary] = {}
+        for boundary, rings in self._tree.query_point(lng, lat):
+            current = matches.get(boundary.level)
+            if current is not None and current.area <= boundary.area:
+                continue
+            if point_in_polygon(lng, lat, rings):
+                matches[boundary.level] = boundary
+        
+        if not matches:
+            return None
+        
+        components: Dict[str, Any] = {}
+        for level, boundary in matches.items():
+            components[level] = boundary.name(language)
+            if level == "country":
+                code = (
+                    boundary.properties.get("ISO3166-1:alpha2")
+                    or boundary.properties.get("iso_a2")
+                    or boundary.properties.get("country_code")
+                )
+                components["countryCode"] = code.upper() if code else None
+            elif level == "state":
+                components["stateCode"] = boundary.properties.get("ISO3166-2") or boundary.properties.get("state_code")
+        return {"components": components}
+
+
+# Loaded once per process and shared, like the in-memory cache store
+_admin_index: Optional[AdminBoundaryIndex] = None
+_admin_index_loaded = False
+
+def get_admin_boundary_index() -> Optional[AdminBoundaryIndex]:
+    """Lazily load the configured admin boundary dataset; None when not configured or unreadable"""
+    global _admin_index, _admin_index_loaded
+    if _admin_index_loaded:
+        return _admin_index
+    
+    _admin_index_loaded = True
+    if not settings.ADMIN_BOUNDARIES_PATH:
+        return None
+    try:
+        _admin_index = AdminBoundaryIndex.from_geojson(settings.ADMIN_BOUNDARIES_PATH)
+        logger.info("Admin boundaries loaded", path=settings.ADMIN_BOUNDARIES_PATH, polygons=_admin_index.size)
+    except Exception as e:
+        logger.error("Failed to load admin boundaries", path=settings.ADMIN_BOUNDARIES_PATH, error=str(e))
+    return _admin_index
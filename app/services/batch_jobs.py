@@ -0,0 +1,507 @@
+"""Asynchronous large-batch geocoding jobs, checkpointed in SQLite.
+
+A job's points are stored when it is submitted and processed in chunks by a
+small pool of workers. Each chunk's results are committed together with the
+job's progress, so a job interrupted by a restart resumes after its last
+finished chunk. Points that only failed transiently (throttled, out of time,
+providers down) are not checkpointed: they stay pending and are retried with
+exponential backoff. Results are read back from the database in input order.
+
+Every process that shares the database runs jobs, but each job runs in one
+process at a time: a worker claims it atomically and the claim is a lease the
+owning process keeps renewing. A job whose lease runs out (its process died)
+is taken over by another process, and checkpoints are only committed by the
+job's current owner.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Dict, Any, List, Tuple
+import structlog
+from app.config import settings
+from app.models.request import DetailLevel
+from app.models.response import LocationResponse
+from app.services.cache import CacheService
+from app.services.cache_backends import json_default
+from app.services.geocoding import GeocodingService, LOCAL_SOURCES
+from app.utils.deadline import Deadline
+
+logger = structlog.get_logger()
+
+# Job states; queued and running jobs are picked up again once their lease runs out
+UPLOADING = "uploading"
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+ACTIVE_PLACEHOLDERS = ", ".join("?" for _ in ACTIVE_STATES)
+
+# Failures that say nothing about the point itself; retried instead of saved
+RETRYABLE_ERRORS = ("PROVIDERS_UNAVAILABLE", "DEADLINE_EXCEEDED", "GEOCODING_FAILED", "GEOCODING_ERROR")
+
+# Upper bound for result indexes, when no point is pending
+MAX_INDEX = 2 ** 62
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    language TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_points (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    retry_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_points_pending ON job_points (job_id, done, idx);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+) WITHOUT ROWID;
+"""
+
+
+class JobQueueFull(Exception):
+    """Raised when no more jobs can be queued; the caller should retry later"""
+
+
+class JobStore:
+    """SQLite persistence for jobs, their points and their results.
+    
+    Methods are blocking; the job manager runs them in a worker thread.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+    
+    def create_job(self, job_id: str, language: str, detail: str, owner: str, lease_until: float) -> None:
+        """Register a job as uploading; it is only picked up once ``set_status`` queues it"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, language, detail, owner, lease_until, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, UPLOADING, language, detail, owner, lease_until, now, now)
+            )
+    
+    def add_points(self, job_id: str, start: int, points: List[Tuple[float, float]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO job_points (job_id, idx, latitude, longitude) VALUES (?, ?, ?, ?)",
+                ((job_id, start + i, lat, lng) for i, (lat, lng) in enumerate(points))
+            )
+            self._conn.execute(
+                "UPDATE jobs SET total = total + ?, updated_at = ? WHERE id = ?",
+                (len(points), time.time(), job_id)
+            )
+    
+    def delete_job(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            for table, column in (("job_results", "job_id"), ("job_points", "job_id"), ("jobs", "id")):
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (job_id,))
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+    
+    def orphaned_jobs(self, now: float) -> List[str]:
+        """Queued and running jobs whose owner stopped renewing its lease, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({ACTIVE_PLACEHOLDERS}) AND lease_until < ? ORDER BY created_at",
+                (*ACTIVE_STATES, now)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def claim_job(self, job_id: str, owner: str, now: float, lease_until: float) -> bool:
+        """Atomically take a job to run: only if it is still active and either ours or its lease ran out"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, owner = ?, lease_until = ?, updated_at = ? "
+                f"WHERE id = ? AND status IN ({ACTIVE_PLACEHOLDERS}) AND (owner = ? OR lease_until < ?)",
+                (RUNNING, owner, lease_until, now, job_id, *ACTIVE_STATES, owner, now)
+            )
+            return cursor.rowcount == 1
+    
+    def renew_leases(self, owner: str, lease_until: float) -> None:
+        """Extend the lease on every job an owner holds, including ones still uploading (0 releases them)"""
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET lease_until = ? WHERE owner = ? AND status IN ({ACTIVE_PLACEHOLDERS}, ?)",
+                (lease_until, owner, *ACTIVE_STATES, UPLOADING)
+            )
+    
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+    
+    def pending_points(self, job_id: str, limit: int, now: float) -> List[Tuple[int, float, float, int]]:
+        """Next ``limit`` (index, lat, lng, attempts) points without a result that are due; the checkpoint is the results themselves"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT idx, latitude, longitude, attempts FROM job_points "
+                "WHERE job_id = ? AND done = 0 AND retry_at <= ? ORDER BY idx LIMIT ?",
+                (job_id, now, limit)
+            ).fetchall()
+    
+    def next_retry_at(self, job_id: str) -> Optional[float]:
+        """When the earliest point still without a result is due, or None when every point has one"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(retry_at) FROM job_points WHERE job_id = ? AND done = 0",
+                (job_id,)
+            ).fetchone()[0]
+    
+    def save_results(
+        self,
+        job_id: str,
+        owner: str,
+        results: List[Tuple[int, Dict[str, Any]]],
+        retries: List[Tuple[int, float]]
+    ) -> bool:
+        """Commit a chunk's (index, result) pairs and (index, retry_at) backoffs together with the job's progress.
+        
+        Nothing is written, and False returned, when ``owner`` no longer holds
+        the job, so a job taken over by another process is never counted twice.
+        """
+        failed = sum(1 for _, result in results if not result.get("success"))
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET completed = completed + ?, failed = failed + ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (len(results), failed, time.time(), job_id, owner)
+            )
+            if cursor.rowcount != 1:
+                return False
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO job_results (job_id, idx, result) VALUES (?, ?, ?)",
+                ((job_id, idx, json.dumps(result, default=json_default, separators=(",", ":"))) for idx, result in results)
+            )
+            self._conn.executemany(
+                "UPDATE job_points SET done = 1 WHERE job_id = ? AND idx = ?",
+                ((job_id, idx) for idx, _ in results)
+            )
+            self._conn.executemany(
+                "UPDATE job_points SET attempts = attempts + 1, retry_at = ? WHERE job_id = ? AND idx = ?",
+                ((retry_at, job_id, idx) for idx, retry_at in retries)
+            )
+        return True
+    
+    def read_results(self, job_id: str, after: int, limit: int) -> List[Tuple[int, str]]:
+        """Up to ``limit`` (index, result JSON) rows after index ``after``, in input order.
+        
+        Only results before the first point still pending are returned, so a
+        reader that resumes after its last index never skips a point that
+        finishes later on retry. Stored results already carry their ``index``,
+        so they can be streamed as they are.
+        """
+        with self._lock:
+            first_pending = self._conn.execute(
+                "SELECT MIN(idx) FROM job_points WHERE job_id = ? AND done = 0",
+                (job_id,)
+            ).fetchone()[0]
+            return self._conn.execute(
+                "SELECT idx, result FROM job_results WHERE job_id = ? AND idx > ? AND idx < ? ORDER BY idx LIMIT ?",
+                (job_id, after, MAX_INDEX if first_pending is None else first_pending, limit)
+            ).fetchall()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class BatchJobManager:
+    """Runs geocoding jobs on a bounded queue of background workers.
+    
+    Backpressure is applied at both ends: submissions are refused once
+    ``JOB_QUEUE_SIZE`` jobs are waiting, and each worker geocodes one chunk at
+    a time with at most ``JOB_CONCURRENCY`` cache misses in flight, queueing
+    for the provider rate limits instead of being turned away by them. A job
+    whose remaining points are all backing off holds its worker until they are due.
+    
+    Jobs are leased to this manager while it runs them (and while they are
+    uploaded), and a heartbeat renews the leases and adopts jobs other
+    processes abandoned. The SQLite file is only opened once the job API is
+    used, or by the heartbeat once another process has created it.
+    """
+    
+    def __init__(self, geocoding_service: GeocodingService, cache_service: CacheService):
+        self.geocoding_service = geocoding_service
+        self.cache_service = cache_service
+        self._store: Optional[JobStore] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._jobs: set = set()  # Queued here or running here
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(settings.JOBS_DB_PATH)
+        return self._store
+    
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(fn, *args)
+    
+    async def start(self) -> None:
+        """Start the workers and the heartbeat, and take over jobs left unfinished by a previous run"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.JOB_QUEUE_SIZE)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(settings.JOB_WORKERS)]
+        if os.path.exists(settings.JOBS_DB_PATH):
+            await self._adopt_orphans()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+    
+    async def stop(self) -> None:
+        """Stop the workers and release their jobs; a job cut off mid-chunk resumes from its last checkpoint"""
+        tasks = self._workers + ([self._heartbeat_task] if self._heartbeat_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat_task = None
+        self._jobs.clear()
+        if self._store is not None:
+            # Let the next process (or this one, restarted) resume them right away
+            await self._call(self._store.renew_leases, self.owner, 0.0)
+            self._store.close()
+            self._store = None
+    
+    def accepting(self) -> bool:
+        return self._queue is not None and not self._queue.full()
+    
+    async def create_job(self, language: str, detail: DetailLevel) -> str:
+        """Register a job that points are then added to; fails fast when the queue is full"""
+        if not self.accepting():
+            raise JobQueueFull()
+        job_id = uuid.uuid4().hex
+        await self._call(self.store.create_job, job_id, language, detail.value, self.owner, self._lease_until())
+        return job_id
+    
+    async def add_points(self, job_id: str, start: int, points: List[Tuple[float, float]]) -> None:
+        await self._call(self.store.add_points, job_id, start, points)
+    
+    async def submit(self, job_id: str) -> None:
+        """Queue a job whose points have all been added"""
+        await self._call(self.store.set_status, job_id, QUEUED)
+        try:
+            self._enqueue(job_id)
+        except asyncio.QueueFull:
+            await self.discard(job_id)
+            raise JobQueueFull()
+        logger.info("Batch job queued", job_id=job_id, queued=self._queue.qsize())
+    
+    async def discard(self, job_id: str) -> None:
+        """Drop a job that was never queued (e.g. its upload failed)"""
+        await self._call(self.store.delete_job, job_id)
+    
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call(self.store.get_job, job_id)
+    
+    async def read_results(self, job_id: str, after: int, limit: int) -> List[Tuple[int, str]]:
+        return await self._call(self.store.read_results, job_id, after, limit)
+    
+    def _enqueue(self, job_id: str) -> None:
+        self._queue.put_nowait(job_id)
+        self._jobs.add(job_id)
+    
+    @staticmethod
+    def _lease_until() -> float:
+        return time.time() + settings.JOB_LEASE_SECONDS
+    
+    async def _adopt_orphans(self) -> None:
+        """Queue jobs whose owner stopped renewing its lease, as far as the queue has room"""
+        for job_id in await self._call(self.store.orphaned_jobs, time.time()):
+            if self._queue.full():
+                break
+            if job_id not in self._jobs:
+                logger.info("Resuming batch job", job_id=job_id)
+                self._enqueue(job_id)
+    
+    async def _heartbeat(self) -> None:
+        """Keep this manager's leases alive and pick up abandoned jobs"""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            if self._store is None and not os.path.exists(settings.JOBS_DB_PATH):
+                continue
+            try:
+                await self._call(self.store.renew_leases, self.owner, self._lease_until())
+                await self._adopt_orphans()
+            except Exception as e:
+                logger.warning("Batch job heartbeat failed", error=str(e))
+    
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Batch job failed", job_id=job_id, error=str(e))
+                await self._call(self.store.set_status, job_id, FAILED, str(e))
+            finally:
+                self._jobs.discard(job_id)
+                self._queue.task_done()
+    
+    async def _run_job(self, job_id: str) -> None:
+        if not await self._call(self.store.claim_job, job_id, self.owner, time.time(), self._lease_until()):
+            logger.info("Batch job skipped, finished or run by another process", job_id=job_id)
+            return
+        job = await self._call(self.store.get_job, job_id)
+        language, detail = job["language"], DetailLevel(job["detail"])
+        logger.info("Batch job started", job_id=job_id, total=job["total"], completed=job["completed"])
+        
+        while True:
+            points = await self._call(self.store.pending_points, job_id, settings.JOB_CHUNK_SIZE, time.time())
+            if not points:
+                retry_at = await self._call(self.store.next_retry_at, job_id)
+                if retry_at is None:
+                    break
+                await asyncio.sleep(max(0.0, retry_at - time.time()))
+                continue
+            results, retries = await self._process_chunk(points, language, detail)
+            if not await self._call(self.store.save_results, job_id, self.owner, results, retries):
+                logger.warning("Batch job lost its lease to another process", job_id=job_id)
+                return
+            if retries:
+                logger.info("Batch job points backing off", job_id=job_id, points=len(retries))
+        
+        await self._call(self.store.set_status, job_id, COMPLETED)
+        job = await self._call(self.store.get_job, job_id)
+        logger.info("Batch job completed", job_id=job_id, total=job["total"], failed=job["failed"])
+    
+    async def _process_chunk(
+        self,
+        points: List[Tuple[int, float, float, int]],
+        language: str,
+        detail: DetailLevel
+    ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, float]]]:
+        """Geocode one chunk: cache hits first, then each missed cache cell once, concurrently.
+        
+        Returns the (index, result) pairs to save and the (index, retry_at)
+        backoffs of points that failed transiently.
+        """
+        cached_results = await self.cache_service.get_many([(lat, lng) for _, lat, lng, _ in points], language, detail)
+        results: Dict[int, Dict[str, Any]] = {}
+        misses: Dict[Any, List[Tuple[int, float, float, int]]] = {}
+        for point, cached_result in zip(points, cached_results):
+            # Transient failures are negative-cached to shield providers from
+            # interactive retries; jobs back off on their own, so they look again
+            if cached_result and not self._retryable(cached_result):
+                results[point[0]] = LocationResponse(**cached_result).dict()
+            else:
+                misses.setdefault(self.cache_service.generate_cache_key(point[1], point[2], language), []).append(point)
+        
+        semaphore = asyncio.Semaphore(settings.JOB_CONCURRENCY)
+        
+        async def resolve_cell(cell_points: List[Tuple[int, float, float, int]]) -> Tuple[Dict[str, Any], bool]:
+            """Result for one cache cell, and whether to cache it"""
+            _, lat, lng, _ = cell_points[0]
+            try:
+                async with semaphore:
+                    # Each point gets its own budget, starting when its turn comes
+                    deadline = Deadline.from_ms(settings.JOB_POINT_TIMEOUT_MS)
+                    location_response = await self.geocoding_service.reverse_geocode(
+                        lat, lng, language, deadline, detail, wait_for_limits=True
+                    )
+                write = not location_response.success or location_response.data.metadata.source not in LOCAL_SOURCES
+                return location_response.dict(), write
+            except Exception as e:
+                logger.warning("Batch job point failed", error=str(e), lat=lat, lng=lng)
+                return {"success": False, "error": {"code": "GEOCODING_ERROR", "message": "Failed to process location"}}, False
+        
+        cells = list(misses.values())
+        resolved = await asyncio.gather(*(resolve_cell(cell_points) for cell_points in cells))
+        
+        # A usable address from before beats an error, and must not be overwritten by one
+        failed = [i for i, (result, _) in enumerate(resolved) if not result.get("success")]
+        if failed and settings.CACHE_SERVE_STALE_ON_ERROR:
+            stale_results = await self.cache_service.get_many(
+                [(cells[i][0][1], cells[i][0][2]) for i in failed], language, detail, allow_stale=True
+            )
+            for i, stale_result in zip(failed, stale_results):
+                if stale_result and stale_result.get("success"):
+                    resolved[i] = (LocationResponse(**stale_result).dict(), False)
+        
+        writes = []
+        for cell_points, (result, write) in zip(cells, resolved):
+            _, lat, lng, _ = cell_points[0]
+            if write:
+                writes.append((lat, lng, language, result))
+            for idx, _, _, _ in cell_points:
+                results[idx] = result
+        await self.cache_service.set_many(writes)
+        
+        saved, retries = [], []
+        now = time.time()
+        for idx, lat, lng, attempts in points:
+            result = results[idx]
+            if self._retryable(result) and attempts + 1 < settings.JOB_MAX_ATTEMPTS:
+                retries.append((idx, now + self._backoff(attempts)))
+            else:
+                saved.append((idx, {"index": idx, **result, "coordinates": {"latitude": lat, "longitude": lng}}))
+        return saved, retries
+    
+    @staticmethod
+    def _retryable(result: Dict[str, Any]) -> bool:
+        return not result.get("success") and (result.get("error") or {}).get("code") in RETRYABLE_ERRORS
+    
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        """Seconds until a point's next attempt: exponential, capped, with jitter so retries spread out"""
+        backoff = min(settings.JOB_RETRY_MAX_BACKOFF_SECONDS, settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** attempts)
+        return backoff * random.uniform(0.5, 1.0)
+
+
+def job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job row"""
+    total = job["total"]
+    return {
+        "jobId": job["id"],
+        "status": job["status"],
+        "language": job["language"],
+        "detail": job["detail"],
+        "total": total,
+        "completed": job["completed"],
+        "failed": job["failed"],
+        "progress": round(job["completed"] / total, 4) if total else 0.0,
+        "error": job["error"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"]
+    }
@@ -1,27 +1,103 @@
 import json
+import math
+import random
+import time
 import hashlib
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime
 from app.config import settings
+from app.models.request import DetailLevel
 from app.models.response import PlaceType
+from app.services.cache_store import MemoryCacheStore
+from app.services.cache_backends import CacheBackend, MemoryCacheBackend, TieredCacheBackend
+from app.services.spatial_cache import ProximityIndex
+from app.services.cache_snapshot import load_snapshot, write_snapshot
+from app.services.cache_codec import create_codec
+from app.services.cache_keys import CacheKey, KIND_LOCALITY, KIND_SHIFT, pack_key, format_key
 import structlog
 
 logger = structlog.get_logger()
 
-# In-memory cache for serverless environment
-_cache_store = {}
+# In-memory cache for serverless environment, bounded so long-running workers don't grow without limit;
+# entries are held encoded (see CACHE_SERIALIZER)
+_cache_store = MemoryCacheStore(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    policy=settings.CACHE_EVICTION_POLICY
+)
+
+def _create_backend() -> CacheBackend:
+    """Backend selected by CACHE_BACKEND, falling back to memory when Redis is unusable"""
+    codec = create_codec()
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            logger.error("CACHE_BACKEND is redis but REDIS_URL is not set; using in-memory cache")
+        else:
+            try:
+                from app.services.redis_cache import RedisCacheBackend
+                redis_backend = RedisCacheBackend(settings.REDIS_URL, codec)
+                if not settings.CACHE_L1_ENABLED:
+                    return redis_backend
+                l1 = MemoryCacheBackend(MemoryCacheStore(
+                    max_entries=settings.CACHE_L1_MAX_ENTRIES,
+                    max_bytes=settings.CACHE_L1_MAX_BYTES,
+                    policy=settings.CACHE_EVICTION_POLICY
+                ), codec)
+                return TieredCacheBackend(l1, redis_backend, settings.CACHE_L1_TTL_SECONDS, settings.CACHE_INVALIDATION_CHANNEL)
+            except Exception as e:
+                logger.error("Redis cache backend unavailable; using in-memory cache", error=str(e))
+    elif settings.CACHE_BACKEND == "shm":
+        try:
+            from app.services.shm_cache import SharedMemoryCacheBackend
+            return SharedMemoryCacheBackend(
+                settings.CACHE_SHM_PATH,
+                settings.CACHE_SHM_SLOTS,
+                settings.CACHE_SHM_SLOT_BYTES,
+                codec,
+                settings.CACHE_SHM_PROBE
+            )
+        except Exception as e:
+            logger.error("Shared-memory cache backend unavailable; using in-memory cache", error=str(e))
+    elif settings.CACHE_BACKEND != "memory":
+        logger.error("Unknown CACHE_BACKEND; using in-memory cache", backend=settings.CACHE_BACKEND)
+    return MemoryCacheBackend(_cache_store, codec)
+
+# Shared by every CacheService instance, like the store itself
+_backend = _create_backend()
+
+# Address components that stay valid across a coarse locality cell
+LOCALITY_COMPONENTS = ("city", "district", "subDistrict", "state", "stateCode", "country", "countryCode", "region")
+
+# Prebuilt entries mapped read-only at import, so cold starts begin warm
+_snapshot = load_snapshot(settings.CACHE_SNAPSHOT_PATH)
+
+# Positions of cached entries, for nearest-neighbor hits across rounding boundaries
+_proximity_index = ProximityIndex(settings.CACHE_PROXIMITY_RADII_M, settings.CACHE_PROXIMITY_MAX_ENTRIES)
+
+# Background task reclaiming expired entries (started from the app lifespan)
+_expiry_task: Optional[asyncio.Task] = None
 
 class CacheService:
-    def __init__(self):
-        # Use in-memory cache for serverless deployment
-        self.cache_store = _cache_store
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        # In-memory by default; Redis when CACHE_BACKEND=redis
+        self.backend = backend or _backend
+        self.proximity = _proximity_index if settings.CACHE_PROXIMITY_ENABLED else None
+    
+    def generate_cache_key(self, lat: float, lng: float, language: str = "en") -> CacheKey:
+        """Integer-packed key for the CACHE_PRECISION cell holding the coordinates"""
+        return pack_key(lat, lng, language, settings.CACHE_PRECISION)
+    
+    def generate_locality_key(self, lat: float, lng: float, language: str = "en") -> CacheKey:
+        """Cache key for the coarse cell holding city/state/country components"""
+        return pack_key(lat, lng, language, settings.CACHE_LOCALITY_PRECISION, KIND_LOCALITY)
     
-    def generate_cache_key(self, lat: float, lng: float, language: str = "en") -> str:
-        """Generate cache key for coordinates with precision rounding"""
-        precision = settings.CACHE_PRECISION
-        rounded_lat = round(lat * (10 ** precision)) / (10 ** precision)
-        rounded_lng = round(lng * (10 ** precision)) / (10 ** precision)
-        return f"location:{rounded_lat}:{rounded_lng}:{language}"
+    @staticmethod
+    def describe_key(cache_key: CacheKey) -> str:
+        """Readable form of a cache key for logs and admin responses"""
+        if isinstance(cache_key, int) and cache_key >> KIND_SHIFT == KIND_LOCALITY:
+            return format_key(cache_key, settings.CACHE_LOCALITY_PRECISION)
+        return format_key(cache_key, settings.CACHE_PRECISION)
     
     def get_cache_ttl(self, place_type: str) -> int:
         """Get TTL based on place type"""
@@ -34,66 +110,462 @@ class CacheService:
         }
         return ttl_mapping.get(place_type, settings.CACHE_TTL_DEFAULT)
     
-    async def get_location(self, lat: float, lng: float, language: str = "en") -> Optional[Dict[Any, Any]]:
-        """Get cached location data"""
+    async def get_location(
+        self,
+        lat: float,
+        lng: float,
+        language: str = "en",
+        detail: DetailLevel = DetailLevel.STREET,
+        allow_stale: bool = False
+    ) -> Optional[Dict[Any, Any]]:
+        """Get cached location data; locality-level requests can also be answered from the coarse cell.
+        
+        Entries past their TTL are kept for ``CACHE_STALE_GRACE_SECONDS`` and only
+        returned with ``allow_stale``, marked through ``metadata.stale``.
+        """
         try:
             cache_key = self.generate_cache_key(lat, lng, language)
             
-            if cache_key in self.cache_store:
-                cached_item = self.cache_store[cache_key]
-                
-                # Check if cache has expired
-                if datetime.utcnow() < cached_item['expires_at']:
-                    logger.info("Cache hit", cache_key=cache_key)
-                    return cached_item['data']
-                else:
-                    # Remove expired item
-                    del self.cache_store[cache_key]
-            
-            logger.info("Cache miss", cache_key=cache_key)
-            return None
+            # Backends only return live entries; expired ones are reclaimed actively
+            cached_data = await self._get_entry(cache_key)
+            if cached_data is not None:
+                logger.info("Cache hit", cache_key=self.describe_key(cache_key))
+            
+            if cached_data is None and self.proximity is not None:
+                cached_data = await self._get_nearby(lat, lng, language)
+            
+            if cached_data is None and detail == DetailLevel.LOCALITY:
+                locality_key = self.generate_locality_key(lat, lng, language)
+                cached_data = await self._get_entry(locality_key)
+                if cached_data is not None:
+                    logger.info("Locality cache hit", cache_key=self.describe_key(locality_key))
             
+            if cached_data is None:
+                logger.info("Cache miss", cache_key=self.describe_key(cache_key))
+                return None
+            return self._fresh(cache_key, cached_data, allow_stale)
+        
         except Exception as e:
             logger.error("Cache error during get", error=str(e))
             return None
     
+    async def get_many(
+        self,
+        points: List[Tuple[float, float]],
+        language: str = "en",
+        detail: DetailLevel = DetailLevel.STREET,
+        allow_stale: bool = False
+    ) -> List[Optional[Dict[Any, Any]]]:
+        """Cached data for many (lat, lng) points, in input order; same rules as ``get_location``.
+        
+        Points sharing a cache cell are looked up once, and the backend is read
+        in one pipelined operation, plus one for the proximity and locality
+        fallbacks of the points that missed.
+        """
+        try:
+            keys = [self.generate_cache_key(lat, lng, language) for lat, lng in points]
+            found = await self._get_entries(list(dict.fromkeys(keys)))
+            entries = [found.get(key) for key in keys]
+            
+            missed = [i for i, entry in enumerate(entries) if entry is None]
+            nearby = {}
+            if self.proximity is not None:
+                for i in missed:
+                    match = self.proximity.nearest(points[i][0], points[i][1], language)
+                    if match is not None:
+                        nearby[i] = match
+            locality_keys = {}
+            if detail == DetailLevel.LOCALITY:
+                locality_keys = {i: self.generate_locality_key(points[i][0], points[i][1], language) for i in missed}
+            
+            fallback_keys = [match[0] for match in nearby.values()] + list(locality_keys.values())
+            found = await self._get_entries(list(dict.fromkeys(fallback_keys)))
+            for i in missed:
+                if i in nearby:
+                    entries[i] = self._nearby_hit(nearby[i], found.get(nearby[i][0]))
+                if entries[i] is None and i in locality_keys:
+                    entries[i] = found.get(locality_keys[i])
+            
+            logger.info(
+                "Cache batch lookup",
+                points=len(points),
+                keys=len(set(keys)),
+                hits=sum(1 for entry in entries if entry is not None)
+            )
+            return [
+                self._fresh(key, entry, allow_stale) if entry is not None else None
+                for key, entry in zip(keys, entries)
+            ]
+        
+        except Exception as e:
+            logger.error("Cache error during batch get", error=str(e))
+            return [None] * len(points)
+    
+    def _fresh(self, cache_key: CacheKey, cached_data: Dict[Any, Any], allow_stale: bool) -> Optional[Dict[Any, Any]]:
+        """Cached data marked for the response, or None when it is past its TTL and stale entries are not wanted"""
+        stale_seconds = time.time() - cached_data.get("expires_at", math.inf)
+        if stale_seconds > 0 and not allow_stale:
+            logger.info("Cache entry stale", cache_key=self.describe_key(cache_key), stale_seconds=round(stale_seconds))
+            return None
+        return self._mark_cached(cached_data, stale_seconds)
+    
+    async def _get_entry(self, cache_key: CacheKey) -> Optional[Dict[Any, Any]]:
+        """Entry from the backend, else from the snapshot (copied into the backend on a hit)"""
+        cached_data = await self.backend.get(cache_key)
+        if cached_data is not None or _snapshot is None:
+            return cached_data
+        
+        match = _snapshot.get(cache_key)
+        if match is None:
+            return None
+        cached_data, ttl = match
+        await self.backend.set(cache_key, cached_data, ttl)
+        logger.info("Cache snapshot hit", cache_key=self.describe_key(cache_key))
+        return cached_data
+    
+    async def _get_entries(self, cache_keys: List[CacheKey]) -> Dict[CacheKey, Dict[Any, Any]]:
+        """Entries for many keys in one backend read; snapshot hits are copied into the backend in one write"""
+        found = await self.backend.get_many(cache_keys) if cache_keys else {}
+        if _snapshot is None:
+            return found
+        
+        promoted = []
+        for cache_key in cache_keys:
+            if cache_key not in found:
+                match = _snapshot.get(cache_key)
+                if match is not None:
+                    found[cache_key] = match[0]
+                    promoted.append((cache_key, match[0], match[1]))
+        if promoted:
+            await self.backend.set_many(promoted)
+            logger.info("Cache snapshot hits", entries=len(promoted))
+        return found
+    
+    @staticmethod
+    def _mark_cached(data: Dict[Any, Any], stale_seconds: float) -> Dict[Any, Any]:
+        """Copy of a cached response with metadata.cached set and, past its TTL, metadata.stale"""
+        metadata = (data.get("data") or {}).get("metadata")
+        if metadata is None:
+            return data
+        stale = stale_seconds > 0
+        return {
+            **data,
+            "data": {
+                **data["data"],
+                "metadata": {
+                    **metadata,
+                    "cached": True,
+                    "stale": stale,
+                    "staleSeconds": int(stale_seconds) if stale else None
+                }
+            }
+        }
+    
+    async def _get_nearby(self, lat: float, lng: float, language: str) -> Optional[Dict[Any, Any]]:
+        """Nearest cached result within its place type's radius"""
+        match = self.proximity.nearest(lat, lng, language)
+        if match is None:
+            return None
+        return self._nearby_hit(match, await self.backend.get(match[0]))
+    
+    def _nearby_hit(self, match: Tuple[CacheKey, float], cached_data: Optional[Dict[Any, Any]]) -> Optional[Dict[Any, Any]]:
+        """The entry read for a proximity match, if it can answer for neighbouring points"""
+        cache_key, distance = match
+        if cached_data is None or not cached_data.get("success"):
+            # Evicted, expired or overwritten by a failure in the backend; stop pointing at it
+            self.proximity.remove(cache_key)
+            return None
+        
+        self.proximity.hits += 1
+        logger.info("Proximity cache hit", cache_key=self.describe_key(cache_key), distance_m=round(distance, 1))
+        return cached_data
+    
+    @staticmethod
+    def _processing_seconds(data: Dict[Any, Any]) -> float:
+        """Provider time recorded in a response's metadata.processingTime ("0.123s")"""
+        metadata = (data.get("data") or {}).get("metadata") or {}
+        try:
+            return float(str(metadata.get("processingTime", "0")).rstrip("s"))
+        except ValueError:
+            return 0.0
+    
+    def should_refresh_early(self, cached_data: Dict[Any, Any]) -> bool:
+        """XFetch: refresh before expiry with a probability that grows as expiry nears.
+        
+        Refresh when ``now - fetch_seconds * beta * ln(rand()) >= expires_at``, so
+        entries that were slow to fetch start refreshing earlier, and under load
+        usually just one request triggers it while the rest keep the cached entry.
+        """
+        if not settings.CACHE_EARLY_REFRESH_ENABLED or not cached_data.get("success"):
+            return False
+        expires_at = cached_data.get("expires_at")
+        fetch_seconds = cached_data.get("fetch_seconds")
+        if not expires_at or not fetch_seconds:
+            return False
+        jitter = -math.log(1.0 - random.random())
+        return time.time() + fetch_seconds * settings.CACHE_EARLY_REFRESH_BETA * jitter >= expires_at
+    
+    @staticmethod
+    def _place_type(data: Dict[Any, Any]) -> Optional[str]:
+        """Place type of a cached LocationResponse dict, if it holds an address"""
+        address = (data.get("data") or {}).get("address") or {}
+        place_type = address.get("placeType")
+        return getattr(place_type, "value", place_type)
+    
+    @staticmethod
+    def _locality_entry(data: Dict[Any, Any]) -> Optional[Dict[Any, Any]]:
+        """Copy of a successful response reduced to the components shared by its whole locality cell"""
+        address = (data.get("data") or {}).get("address") if data.get("success") else None
+        if not address:
+            return None
+        components = {
+            name: address["components"].get(name)
+            for name in LOCALITY_COMPONENTS
+            if address["components"].get(name)
+        }
+        if not components:
+            return None
+        
+        parts = [components.get(name) for name in ("city", "district", "state", "country")]
+        formatted_address = ", ".join(part for part in parts if part)
+        place_type = PlaceType.LOCALITY if components.get("city") else PlaceType.ADMINISTRATIVE
+        return {
+            **data,
+            "data": {
+                **data["data"],
+                "address": {
+                    **address,
+                    "fullAddress": formatted_address,
+                    "formattedAddress": formatted_address,
+                    "shortAddress": formatted_address[:50] + "..." if len(formatted_address) > 50 else formatted_address,
+                    "components": components,
+                    "coordinates": {**address["coordinates"], "accuracy": "approximate"},
+                    "placeType": place_type.value
+                }
+            }
+        }
+    
+    def _entries(
+        self,
+        cache_key: CacheKey,
+        lat: float,
+        lng: float,
+        language: str,
+        data: Dict[Any, Any],
+        place_type: Optional[str] = None,
+        fetch_seconds: Optional[float] = None
+    ) -> List[Tuple[CacheKey, Dict[Any, Any], float]]:
+        """(key, entry, backend TTL) writes that cache one response: its own cell first, then its locality cell"""
+        # expires_at is wall-clock so it means the same on every instance
+        now = time.time()
+        cached_at = datetime.utcnow().isoformat()
+        
+        if not data.get("success"):
+            ttl = self.get_negative_ttl((data.get("error") or {}).get("code"))
+            if ttl <= 0:
+                return []
+            return [(cache_key, {**data, "cached_at": cached_at, "cache_ttl": ttl, "expires_at": now + ttl, "negative": True}, ttl)]
+        
+        place_type = place_type or self._place_type(data)
+        ttl = self.get_cache_ttl(place_type) if place_type else settings.CACHE_TTL_DEFAULT
+        cache_data = {
+            **data,
+            "cached_at": cached_at,
+            "cache_ttl": ttl,
+            "expires_at": now + ttl,
+            "fetch_seconds": fetch_seconds if fetch_seconds is not None else self._processing_seconds(data)
+        }
+        
+        # Store past the TTL, so the entry can still be served stale
+        grace = settings.CACHE_STALE_GRACE_SECONDS
+        entries = [(cache_key, cache_data, ttl + grace)]
+        
+        locality = self._locality_entry(data)
+        if locality is not None:
+            locality_ttl = self.get_cache_ttl(self._place_type(locality))
+            entries.append((
+                self.generate_locality_key(lat, lng, language),
+                {**locality, "cached_at": cached_at, "cache_ttl": locality_ttl, "expires_at": now + locality_ttl},
+                locality_ttl + grace
+            ))
+        return entries
+    
     async def set_location(
         self, 
         lat: float, 
         lng: float, 
         language: str,
         data: Dict[Any, Any], 
-        place_type: Optional[str] = None
+        place_type: Optional[str] = None,
+        fetch_seconds: Optional[float] = None
     ) -> bool:
-        """Cache location data"""
+        """Cache location data at its own cell, and its locality components at the coarse cell.
+        
+        The TTL follows the place type, taken from the data when not given.
+        Failed lookups are cached as negative entries with their own short TTLs.
+        ``fetch_seconds`` (how long the provider call took, by default the
+        response's processingTime) weighs probabilistic early refresh.
+        """
         try:
             cache_key = self.generate_cache_key(lat, lng, language)
-            ttl = self.get_cache_ttl(place_type) if place_type else settings.CACHE_TTL_DEFAULT
+            entries = self._entries(cache_key, lat, lng, language, data, place_type, fetch_seconds)
+            if not entries:
+                return False
             
-            # Add cache metadata
-            cache_data = {
-                **data,
-                "cached_at": datetime.utcnow().isoformat(),
-                "cache_ttl": ttl
-            }
+            stored = await self.backend.set(*entries[0])
+            for entry in entries[1:]:
+                await self.backend.set(*entry)
             
-            # Store with expiration time
-            self.cache_store[cache_key] = {
-                'data': cache_data,
-                'expires_at': datetime.utcnow() + timedelta(seconds=ttl)
-            }
+            # Reclaim a small slice of expired entries on every write, so memory
+            # is bounded even where the background expiry task is not running
+            await self.backend.expire(settings.CACHE_EXPIRY_WRITE_SLICE)
             
-            logger.info("Data cached", cache_key=cache_key, ttl=ttl)
-            return True
+            if not stored:
+                logger.info("Data not cached", cache_key=self.describe_key(cache_key), backend=self.backend.name)
+                return False
+            
+            ttl = entries[0][1]["cache_ttl"]
+            if not data.get("success"):
+                # A negative entry is no answer for neighbouring points
+                if self.proximity is not None:
+                    self.proximity.remove(cache_key)
+                logger.info("Failure cached", cache_key=self.describe_key(cache_key), error_code=(data.get("error") or {}).get("code"), ttl=ttl)
+                return True
+            
+            if self.proximity is not None:
+                self.proximity.add(cache_key, lat, lng, language, self._place_type(data), entries[0][2])
             
+            logger.info("Data cached", cache_key=self.describe_key(cache_key), ttl=ttl)
+            return True
+        
         except Exception as e:
             logger.error("Cache error during set", error=str(e))
             return False
     
+    async def set_many(self, items: List[Tuple[float, float, str, Dict[Any, Any]]]) -> int:
+        """Cache many (lat, lng, language, data) results in one pipelined backend write.
+        
+        Results landing in the same cell are written once (the last one wins).
+        Returns how many entries were stored, locality entries included.
+        """
+        try:
+            entries: Dict[CacheKey, Tuple[CacheKey, Dict[Any, Any], float]] = {}
+            indexed, unindexed = [], []
+            for lat, lng, language, data in items:
+                cache_key = self.generate_cache_key(lat, lng, language)
+                written = self._entries(cache_key, lat, lng, language, data)
+                for entry in written:
+                    entries[entry[0]] = entry
+                if written and data.get("success"):
+                    indexed.append((cache_key, lat, lng, language, self._place_type(data), written[0][2]))
+                elif written:
+                    unindexed.append(cache_key)
+            if not entries:
+                return 0
+            
+            stored = await self.backend.set_many(list(entries.values()))
+            await self.backend.expire(settings.CACHE_EXPIRY_WRITE_SLICE)
+            
+            if self.proximity is not None:
+                for cache_key in unindexed:
+                    self.proximity.remove(cache_key)
+                for entry in indexed:
+                    self.proximity.add(*entry)
+            
+            logger.info("Batch cached", results=len(items), entries=len(entries), stored=stored)
+            return stored
+        
+        except Exception as e:
+            logger.error("Cache error during batch set", error=str(e))
+            return 0
+    
+    def get_negative_ttl(self, error_code: Optional[str]) -> int:
+        """TTL for a failed lookup: long when no address exists there, short for outages, 0 to skip caching"""
+        if error_code == "NO_RESULT":
+            return settings.CACHE_NO_RESULT_TTL_SECONDS
+        if error_code in ("DEADLINE_EXCEEDED", "PROVIDERS_UNAVAILABLE"):
+            # A blown response budget or a provider that was never called says nothing about the location
+            return 0
+        return settings.CACHE_NEGATIVE_TTL_SECONDS
+    
+    async def delete_location(self, lat: float, lng: float, language: str = "en") -> bool:
+        """Remove one cached location from every tier and instance"""
+        try:
+            cache_key = self.generate_cache_key(lat, lng, language)
+            if self.proximity is not None:
+                self.proximity.remove(cache_key)
+            deleted = await self.backend.delete(cache_key)
+            logger.info("Cache entry purged", cache_key=self.describe_key(cache_key), deleted=deleted)
+            return deleted
+        except Exception as e:
+            logger.error("Cache error during delete", error=str(e))
+            return False
+    
+    async def invalidate_location(self, lat: float, lng: float, language: str = "en") -> None:
+        """Drop other instances' in-process copies of a location after it was rewritten"""
+        try:
+            await self.backend.invalidate([self.generate_cache_key(lat, lng, language)])
+        except Exception as e:
+            logger.error("Cache error during invalidate", error=str(e))
+    
+    async def purge(self) -> None:
+        """Remove every cached location from every tier and instance"""
+        _proximity_index.clear()
+        await self.backend.clear()
+        logger.info("Cache purged", backend=self.backend.name)
+    
+    async def export_snapshot(self, path: str) -> int:
+        """Write every live entry to a snapshot file that CACHE_SNAPSHOT_PATH can load; returns the entry count"""
+        items = [item async for item in self.backend.scan()]
+        count = await asyncio.to_thread(write_snapshot, path, items)
+        logger.info("Cache snapshot exported", path=path, entries=count)
+        return count
+    
+    async def run_expiry(self) -> None:
+        """Reclaim expired entries forever, in small slices that yield to the event loop"""
+        while True:
+            await asyncio.sleep(settings.CACHE_EXPIRY_INTERVAL_SECONDS)
+            try:
+                while await self.backend.expire(settings.CACHE_EXPIRY_SLICE) == settings.CACHE_EXPIRY_SLICE:
+                    await asyncio.sleep(0)
+            except Exception as e:
+                logger.error("Cache expiry error", error=str(e))
+    
+    def start_expiry(self) -> None:
+        """Start the shared background expiry task if it is not already running"""
+        global _expiry_task
+        if _expiry_task is None or _expiry_task.done():
+            _expiry_task = asyncio.create_task(self.run_expiry())
+    
+    async def startup(self) -> None:
+        """Start background work: expiry and, for tiered backends, the invalidation listener"""
+        self.start_expiry()
+        await self.backend.start()
+    
+    async def stop_expiry(self) -> None:
+        """Stop the background expiry task"""
+        global _expiry_task
+        task, _expiry_task = _expiry_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters (size, evictions and admissions for the in-memory cache)"""
+        stats = self.backend.stats()
+        if _snapshot is not None:
+            stats["snapshot"] = _snapshot.stats()
+        if self.proximity is not None:
+            stats["proximity"] = self.proximity.stats()
+        return stats
+    
+    async def close(self) -> None:
+        """Release backend connections"""
+        await self.backend.close()
+    
     async def health_check(self) -> bool:
         """Check cache health"""
         try:
-            # Simple health check for in-memory cache
-            return True
+            return await self.backend.health_check()
         except Exception:
             return False
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""Storage backends behind CacheService"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable, AsyncIterator
+import structlog
+from app.services.cache_keys import CacheKey
+from app.services.cache_store import MemoryCacheStore
+
+logger = structlog.get_logger()
+
+
+def json_default(obj: Any) -> Any:
+    """JSON encoding for the datetimes found in cached responses"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+class CacheBackend:
+    """Interface every CacheService backend implements.
+    
+    Backends never raise on lookups: an unreachable or slow backend reports a
+    miss (or a failed write) so callers fall through to the providers.
+    """
+    
+    name = "base"
+    
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    async def set(self, key: CacheKey, value: Dict[str, Any], ttl: Optional[float]) -> bool:
+        raise NotImplementedError
+    
+    async def delete(self, key: CacheKey) -> bool:
+        raise NotImplementedError
+    
+    async def get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        """Values for the keys that are present, in one backend operation where possible"""
+        results = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                results[key] = value
+        return results
+    
+    async def set_many(self, items: List[Tuple[CacheKey, Dict[str, Any], Optional[float]]]) -> int:
+        """Store (key, value, ttl) items; returns how many were stored"""
+        stored = 0
+        for key, value, ttl in items:
+            stored += await self.set(key, value, ttl)
+        return stored
+    
+    async def clear(self) -> None:
+        raise NotImplementedError
+    
+    async def expire(self, limit: int) -> int:
+        """Reclaim up to ``limit`` expired entries (no-op for backends with native TTLs)"""
+        return 0
+    
+    async def scan(self) -> AsyncIterator[Tuple[CacheKey, Dict[str, Any], Optional[float]]]:
+        """Yield every live (key, value, remaining ttl) entry"""
+        raise NotImplementedError
+        yield
+    
+    async def invalidate(self, keys: Optional[List[CacheKey]] = None) -> None:
+        """Drop process-local copies of keys (all of them when None) on every instance"""
+        pass
+    
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Broadcast a message to every instance (no-op for process-local backends)"""
+        pass
+    
+    async def listen(self, channel: str, handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        """Deliver broadcast messages to handler until cancelled (returns at once for process-local backends)"""
+        pass
+    
+    async def start(self) -> None:
+        """Start background work owned by the backend"""
+        pass
+    
+    async def health_check(self) -> bool:
+        return True
+    
+    async def close(self) -> None:
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process-local backend on a bounded MemoryCacheStore.
+    
+    With a codec, entries are held as compact encoded bytes and only decoded
+    when read, instead of as nested Python objects.
+    """
+    
+    name = "memory"
+    
+    def __init__(self, store: MemoryCacheStore, codec=None):
+        self.store = store
+        self.codec = codec
+    
+    def _decode(self, raw: Any) -> Optional[Dict[str, Any]]:
+        if raw is None or self.codec is None:
+            return raw
+        try:
+            return self.codec.decode(raw)
+        except Exception as e:
+            logger.warning("Undecodable cache entry, treating as miss", error=str(e))
+            return None
+    
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        return self._decode(self.store.get(key))
+    
+    async def set(self, key: CacheKey, value: Dict[str, Any], ttl: Optional[float]) -> bool:
+        if self.codec is not None:
+            value = self.codec.encode(value)
+        return self.store.set(key, value, ttl)
+    
+    async def delete(self, key: CacheKey) -> bool:
+        return self.store.delete(key)
+    
+    async def clear(self) -> None:
+        self.store.clear()
+    
+    async def expire(self, limit: int) -> int:
+        return self.store.expire(limit)
+    
+    async def scan(self) -> AsyncIterator[Tuple[CacheKey, Dict[str, Any], Optional[float]]]:
+        for key, raw, ttl in self.store.items():
+            value = self._decode(raw)
+            if value is not None:
+                yield key, value, ttl
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = {"backend": self.name, **self.store.stats()}
+        if self.codec is not None:
+            stats["codec"] = self.codec.stats()
+        return stats
+
+
+class TieredCacheBackend(CacheBackend):
+    """Small in-process L1 in front of a shared L2 (Redis).
+    
+    L1 entries live for at most ``l1_ttl`` seconds. Deletes, purges and
+    explicit invalidations are broadcast over the L2's pub/sub channel so
+    every instance drops its L1 copy; each instance ignores its own messages.
+    """
+    
+    name = "tiered"
+    
+    def __init__(self, l1: MemoryCacheBackend, l2: CacheBackend, l1_ttl: float, channel: str):
+        self.l1 = l1
+        self.l2 = l2
+        self.l1_ttl = l1_ttl
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.invalidations_received = 0
+    
+    def _l1_ttl(self, ttl: Optional[float]) -> float:
+        return self.l1_ttl if ttl is None else min(ttl, self.l1_ttl)
+    
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        value = await self.l1.get(key)
+        if value is not None:
+            self.l1_hits += 1
+            return value
+        
+        value = await self.l2.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.l2_hits += 1
+        await self.l1.set(key, value, self.l1_ttl)
+        return value
+    
+    async def set(self, key: CacheKey, value: Dict[str, Any], ttl: Optional[float]) -> bool:
+        stored = await self.l2.set(key, value, ttl)
+        # Keep serving from L1 even if L2 is unavailable
+        await self.l1.set(key, value, self._l1_ttl(ttl))
+        return stored
+    
+    async def delete(self, key: CacheKey) -> bool:
+        await self.l1.delete(key)
+        deleted = await self.l2.delete(key)
+        await self._broadcast({"op": "delete", "keys": [key]})
+        return deleted
+    
+    async def get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        results = {}
+        missing = []
+        for key in keys:
+            value = await self.l1.get(key)
+            if value is not None:
+                self.l1_hits += 1
+                results[key] = value
+            else:
+                missing.append(key)
+        
+        if missing:
+            found = await self.l2.get_many(missing)
+            self.l2_hits += len(found)
+            self.misses += len(missing) - len(found)
+            for key, value in found.items():
+                await self.l1.set(key, value, self.l1_ttl)
+            results.update(found)
+        return results
+    
+    async def set_many(self, items: List[Tuple[CacheKey, Dict[str, Any], Optional[float]]]) -> int:
+        stored = await self.l2.set_many(items)
+        for key, value, ttl in items:
+            await self.l1.set(key, value, self._l1_ttl(ttl))
+        return stored
+    
+    async def clear(self) -> None:
+        await self.l1.clear()
+        await self.l2.clear()
+        await self._broadcast({"op": "clear"})
+    
+    async def invalidate(self, keys: Optional[List[CacheKey]] = None) -> None:
+        if keys is None:
+            await self.l1.clear()
+            await self._broadcast({"op": "clear"})
+        else:
+            for key in keys:
+                await self.l1.delete(key)
+            await self._broadcast({"op": "delete", "keys": keys})
+    
+    async def expire(self, limit: int) -> int:
+        return await self.l1.expire(limit)
+    
+    async def scan(self) -> AsyncIterator[Tuple[CacheKey, Dict[str, Any], Optional[float]]]:
+        async for item in self.l2.scan():
+            yield item
+    
+    async def _broadcast(self, message: Dict[str, Any]) -> None:
+        await self.l2.publish(self.channel, {**message, "origin": self.instance_id})
+    
+    async def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        if message.get("origin") == self.instance_id:
+            return
+        self.invalidations_received += 1
+        if message.get("op") == "clear":
+            await self.l1.clear()
+        elif message.get("op") == "delete":
+            for key in message.get("keys", []):
+                await self.l1.delete(key)
+    
+    async def start(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self.l2.listen(self.channel, self._on_invalidation))
+    
+    async def health_check(self) -> bool:
+        return await self.l2.health_check()
+    
+    async def close(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+        await self.l2.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "backend": self.name,
+            "lookups": lookups,
+            "l1": {
+                "hits": self.l1_hits,
+                "hitRatio": round(self.l1_hits / lookups, 4) if lookups else 0.0,
+                **self.l1.stats()
+            },
+            "l2": {
+                "hits": self.l2_hits,
+                "hitRatio": round(self.l2_hits / lookups, 4) if lookups else 0.0,
+                **self.l2.stats()
+            },
+            "misses": self.misses,
+            "invalidationsReceived": self.invalidations_received
+        }
@@ -0,0 +1,140 @@
+"""Compact byte encoding for cache entries, with optional zstd compression"""
+import json
+from typing import Optional, Dict, Any, List
+import structlog
+from app.config import settings
+from app.services.cache_backends import json_default
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for CACHE_SERIALIZER=msgpack
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for CACHE_COMPRESSION=zstd
+    zstandard = None
+
+logger = structlog.get_logger()
+
+# First byte of every encoded entry; lets entries written with other settings still decode
+TAG_JSON = 0x01
+TAG_MSGPACK = 0x02
+TAG_ZSTD = 0x80
+# Untagged JSON objects written before entries were tagged start with "{"
+LEGACY_JSON = ord("{")
+
+
+class CacheCodec:
+    """Encode cached values to compact bytes (orjson, json or msgpack), zstd-compressing larger ones"""
+    
+    def __init__(
+        self,
+        serializer: str = "orjson",
+        compression: Optional[str] = None,
+        level: int = 3,
+        min_compress_bytes: int = 256,
+        dictionary: Optional[bytes] = None
+    ):
+        if serializer == "msgpack" and msgpack is None:
+            logger.warning("msgpack is not installed; cache entries use JSON")
+            serializer = "orjson"
+        if serializer == "orjson" and orjson is None:
+            serializer = "json"
+        if serializer not in ("orjson", "json", "msgpack"):
+            raise ValueError(f"Unknown cache serializer '{serializer}', expected orjson, json or msgpack")
+        self.serializer = serializer
+        
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; cache entries are not compressed")
+            compression = None
+        if compression not in (None, "zstd"):
+            raise ValueError(f"Unknown cache compression '{compression}', expected zstd")
+        self.compression = compression
+        self.min_compress_bytes = min_compress_bytes
+        
+        self._compressor = None
+        self._decompressor = None
+        if zstandard is not None:
+            zstd_dict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            if compression == "zstd":
+                self._compressor = zstandard.ZstdCompressor(level=level, dict_data=zstd_dict)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zstd_dict)
+        self.has_dictionary = dictionary is not None
+        
+        self.encodes = 0
+        self.encoded_bytes = 0
+    
+    def _serialize(self, value: Dict[str, Any]) -> bytes:
+        if self.serializer == "msgpack":
+            return bytes([TAG_MSGPACK]) + msgpack.packb(value, default=json_default)
+        if self.serializer == "orjson":
+            return bytes([TAG_JSON]) + orjson.dumps(value)
+        return bytes([TAG_JSON]) + json.dumps(value, default=json_default, separators=(",", ":")).encode()
+    
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        data = self._serialize(value)
+        if self._compressor is not None and len(data) >= self.min_compress_bytes:
+            data = bytes([data[0] | TAG_ZSTD]) + self._compressor.compress(data[1:])
+        self.encodes += 1
+        self.encoded_bytes += len(data)
+        return data
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        """Decode bytes or a memoryview (e.g. straight out of a shared mapping)"""
+        tag = data[0]
+        if tag == LEGACY_JSON:
+            return json.loads(bytes(data))
+        body = data[1:]
+        if tag & TAG_ZSTD:
+            if self._decompressor is None:
+                raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+            body = self._decompressor.decompress(body)
+            tag &= ~TAG_ZSTD
+        if tag == TAG_MSGPACK:
+            if msgpack is None:
+                raise ValueError("Cache entry is msgpack-encoded but msgpack is not installed")
+            return msgpack.unpackb(body)
+        if tag == TAG_JSON:
+            return orjson.loads(body) if orjson is not None else json.loads(bytes(body))
+        raise ValueError(f"Unknown cache entry tag {tag:#x}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "serializer": self.serializer,
+            "compression": self.compression,
+            "dictionary": self.has_dictionary,
+            "encodes": self.encodes,
+            "avgEncodedBytes": round(self.encoded_bytes / self.encodes, 1) if self.encodes else 0
+        }
+
+
+def train_dictionary(samples: List[Dict[str, Any]], dict_size: int = 16384) -> bytes:
+    """Train a zstd dictionary on sample cache values (e.g. a snapshot's entries) for CACHE_ZSTD_DICTIONARY_PATH"""
+    if zstandard is None:
+        raise RuntimeError("The zstandard package is required to train a dictionary")
+    codec = CacheCodec(serializer="orjson" if orjson is not None else "json")
+    return zstandard.train_dictionary(dict_size, [codec.encode(sample)[1:] for sample in samples]).as_bytes()
+
+
+def create_codec() -> CacheCodec:
+    """Codec configured from CACHE_SERIALIZER / CACHE_COMPRESSION settings"""
+    dictionary = None
+    if settings.CACHE_ZSTD_DICTIONARY_PATH:
+        try:
+            with open(settings.CACHE_ZSTD_DICTIONARY_PATH, "rb") as f:
+                dictionary = f.read()
+        except OSError as e:
+            logger.error("Failed to load zstd dictionary", path=settings.CACHE_ZSTD_DICTIONARY_PATH, error=str(e))
+    return CacheCodec(
+        serializer=settings.CACHE_SERIALIZER,
+        compression=settings.CACHE_COMPRESSION,
+        level=settings.CACHE_COMPRESSION_LEVEL,
+        min_compress_bytes=settings.CACHE_COMPRESSION_MIN_BYTES,
+        dictionary=dictionary
+    )
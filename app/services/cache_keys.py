@@ -0,0 +1,92 @@
+"""Integer-packed cache keys.
+
+A key quantizes lat/lng to integers at the cache precision and packs them with
+a kind (exact cell or coarse locality cell) and a language id into one 62-bit
+int::
+
+    kind(1) | language(10) | lat(25) | lng(26)
+
+Ints hash and compare without allocation or float formatting. Redis and the
+snapshot file use the same key as fixed-size bytes (``key_bytes``). Languages
+outside ``[a-z]{2}`` and precisions above 5 decimals don't fit the layout and
+keep a readable string key instead.
+"""
+import hashlib
+from typing import Tuple, Union
+
+CacheKey = Union[int, str]
+
+KIND_LOCATION = 0
+KIND_LOCALITY = 1
+
+MAX_PACKED_PRECISION = 5
+LNG_BITS = 26
+LAT_BITS = 25
+LANGUAGE_BITS = 10
+LAT_SHIFT = LNG_BITS
+LANGUAGE_SHIFT = LAT_SHIFT + LAT_BITS
+KIND_SHIFT = LANGUAGE_SHIFT + LANGUAGE_BITS
+
+REDIS_PREFIX = b"loc:"
+KIND_NAMES = {KIND_LOCATION: "location", KIND_LOCALITY: "location:locality"}
+
+
+# Two-letter lowercase codes -> 1..676
+LANGUAGE_IDS = {
+    chr(97 + first) + chr(97 + second): first * 26 + second + 1
+    for first in range(26)
+    for second in range(26)
+}
+LANGUAGE_CODES = {language_id: code for code, language_id in LANGUAGE_IDS.items()}
+
+
+def pack_key(lat: float, lng: float, language: str, precision: int, kind: int = KIND_LOCATION) -> CacheKey:
+    """Cache key for the cell containing (lat, lng) at ``precision`` decimals"""
+    scale = 10 ** precision
+    qlat = round(lat * scale)
+    qlng = round(lng * scale)
+    lang = LANGUAGE_IDS.get(language)
+    if lang is None or precision > MAX_PACKED_PRECISION:
+        return f"{KIND_NAMES[kind]}:{qlat / scale}:{qlng / scale}:{language}"
+    return (
+        (kind << KIND_SHIFT)
+        | (lang << LANGUAGE_SHIFT)
+        | ((qlat + 90 * scale) << LAT_SHIFT)
+        | (qlng + 180 * scale)
+    )
+
+
+def unpack_key(key: int, precision: int) -> Tuple[int, float, float, str]:
+    """(kind, lat, lng, language) of a packed key"""
+    scale = 10 ** precision
+    lang = (key >> LANGUAGE_SHIFT) & ((1 << LANGUAGE_BITS) - 1)
+    language = LANGUAGE_CODES[lang]
+    qlat = ((key >> LAT_SHIFT) & ((1 << LAT_BITS) - 1)) - 90 * scale
+    qlng = (key & ((1 << LNG_BITS) - 1)) - 180 * scale
+    return key >> KIND_SHIFT, qlat / scale, qlng / scale, language
+
+
+def format_key(key: CacheKey, precision: int) -> str:
+    """Readable form of a key, for logs and admin responses"""
+    if isinstance(key, str):
+        return key
+    kind, lat, lng, language = unpack_key(key, precision)
+    return f"{KIND_NAMES[kind]}:{lat}:{lng}:{language}"
+
+
+def key_bytes(key: CacheKey) -> bytes:
+    """Fixed 12-byte form of a packed key (string keys are UTF-8 encoded)"""
+    if isinstance(key, int):
+        return REDIS_PREFIX + key.to_bytes(8, "big")
+    return key.encode()
+
+
+def key_from_bytes(raw: bytes) -> CacheKey:
+    if raw.startswith(REDIS_PREFIX) and len(raw) == len(REDIS_PREFIX) + 8:
+        return int.from_bytes(raw[len(REDIS_PREFIX):], "big")
+    return raw.decode()
+
+
+def stable_hash(encoded_key: bytes) -> int:
+    """64-bit hash of a key's bytes that is the same in every process (the built-in hash() is salted)"""
+    return int.from_bytes(hashlib.blake2b(encoded_key, digest_size=8).digest(), "little")
@@ -0,0 +1,131 @@
+"""Read-only, memory-mapped cache snapshots for warm serverless cold starts.
+
+Layout (little-endian)::
+
+    header   magic(8s) count(u32) index_offset(u64), padded to 32 bytes
+    records  key_length(u16) key value  -- value is compact JSON
+    index    count x [key_hash(u64) offset(u64) length(u32) expires_at(f64)], sorted by key_hash
+
+Opening a snapshot only maps the file and reads the header; a lookup binary
+searches the index in place and decodes just the one record it hits, so load
+time does not grow with snapshot size.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Optional, Dict, Any, Iterable, Tuple
+import structlog
+from app.services.cache_backends import json_default
+from app.services.cache_keys import CacheKey, key_bytes, stable_hash
+
+logger = structlog.get_logger()
+
+MAGIC = b"LOCSNAP1"
+HEADER = struct.Struct("<8sIQ")
+HEADER_SIZE = 32
+INDEX_ENTRY = struct.Struct("<QQId")
+KEY_LENGTH = struct.Struct("<H")
+
+
+class CacheSnapshot:
+    """Lookups against a snapshot file mapped into memory"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a cache snapshot")
+        self.hits = 0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _index_entry(self, position: int) -> Tuple[int, int, int, float]:
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + position * INDEX_ENTRY.size)
+    
+    def get(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], Optional[float]]]:
+        """(value, seconds until it expires or None) for a live key, or None"""
+        encoded_key = key_bytes(key)
+        target = stable_hash(encoded_key)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._index_entry(mid)[0] < target:
+                low = mid + 1
+            else:
+                high = mid
+        
+        position = low
+        while position < self.count:
+            entry_hash, offset, length, expires_at = self._index_entry(position)
+            if entry_hash != target:
+                break
+            position += 1
+            
+            (key_length,) = KEY_LENGTH.unpack_from(self._map, offset)
+            start = offset + KEY_LENGTH.size
+            if self._map[start:start + key_length] != encoded_key:
+                continue  # Hash collision
+            
+            remaining = expires_at - time.time() if expires_at else None
+            if remaining is not None and remaining <= 0:
+                return None
+            self.hits += 1
+            return json.loads(self._map[start + key_length:offset + length]), remaining
+        return None
+    
+    def close(self) -> None:
+        self._map.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "entries": self.count, "hits": self.hits}
+
+
+def write_snapshot(path: str, items: Iterable[Tuple[CacheKey, Dict[str, Any], Optional[float]]]) -> int:
+    """Write (key, value, ttl seconds or None) items to ``path`` atomically; returns the entry count.
+    
+    The file is written next to its destination and renamed over it, so
+    processes that still map the previous snapshot keep a consistent view.
+    """
+    now = time.time()
+    index = []
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(bytes(HEADER_SIZE))
+        offset = HEADER_SIZE
+        for key, value, ttl in items:
+            encoded_key = key_bytes(key)
+            record = (
+                KEY_LENGTH.pack(len(encoded_key))
+                + encoded_key
+                + json.dumps(value, default=json_default, separators=(",", ":")).encode()
+            )
+            f.write(record)
+            index.append((stable_hash(encoded_key), offset, len(record), now + ttl if ttl is not None else 0.0))
+            offset += len(record)
+        
+        index.sort()
+        for entry in index:
+            f.write(INDEX_ENTRY.pack(*entry))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(index), offset))
+    os.replace(tmp_path, path)
+    return len(index)
+
+
+def load_snapshot(path: Optional[str]) -> Optional[CacheSnapshot]:
+    """Map the configured snapshot; None when not configured, missing or unreadable"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = CacheSnapshot(path)
+        logger.info("Cache snapshot mapped", path=path, entries=len(snapshot))
+        return snapshot
+    except Exception as e:
+        logger.error("Failed to load cache snapshot", path=path, error=str(e))
+        return None
@@ -0,0 +1,328 @@
+"""Bounded in-memory cache store with pluggable eviction and active expiry"""
+import heapq
+import itertools
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Hashable
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate in-memory footprint of a cached value in bytes"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key) + estimate_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
+# byte -> byte // 2, used to age sketch rows with bytearray.translate
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+class CountMinSketch:
+    """Approximate access frequencies with 4-bit-style saturating counters and periodic aging"""
+    
+    def __init__(self, capacity: int, depth: int = 4):
+        width = 16
+        while width < capacity:
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(depth)]
+        self._seeds = [0x9E3779B97F4A7C15 * (i + 1) & 0xFFFFFFFFFFFFFFFF for i in range(depth)]
+        self._additions = 0
+        self._sample_size = max(10 * capacity, 160)
+    
+    def _indexes(self, key: Hashable) -> List[int]:
+        # Mix first: int keys hash to themselves, so their structure would leak into the indexes
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h = ((h ^ (h >> 33)) * 0xFF51AFD7ED558CCD) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 33
+        return [((h ^ seed) * 0x100000001B3 >> 16) & self._mask for seed in self._seeds]
+    
+    def increment(self, key: Hashable) -> None:
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+    
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+    
+    def _age(self) -> None:
+        """Halve every counter so old popularity fades out"""
+        self._rows = [row.translate(_HALVE) for row in self._rows]
+        self._additions //= 2
+
+
+class LRUPolicy:
+    """Least-recently-used eviction"""
+    
+    name = "lru"
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._order: "OrderedDict[Hashable, None]" = OrderedDict()
+        self.admissions = 0
+        self.rejections = 0
+    
+    def record_access(self, key: Hashable) -> None:
+        self._order.move_to_end(key)
+    
+    def on_insert(self, key: Hashable) -> List[Hashable]:
+        """Track a new key; returns the keys that must be evicted to stay within bounds"""
+        self._order[key] = None
+        self.admissions += 1
+        evicted = []
+        while len(self._order) > self.max_entries:
+            evicted.append(self._order.popitem(last=False)[0])
+        return evicted
+    
+    def on_remove(self, key: Hashable) -> None:
+        self._order.pop(key, None)
+    
+    def evict_one(self) -> Optional[Hashable]:
+        if not self._order:
+            return None
+        return self._order.popitem(last=False)[0]
+
+
+class WTinyLFUPolicy:
+    """W-TinyLFU: a small LRU admission window in front of a segmented-LRU main area.
+    
+    Keys leaving the window only enter the main area if the count-min sketch
+    says they are more popular than the main area's eviction victim, which keeps
+    one-hit wonders from flushing the working set.
+    """
+    
+    name = "tinylfu"
+    
+    def __init__(self, max_entries: int, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        self.max_entries = max_entries
+        self.window_capacity = max(1, int(max_entries * window_ratio))
+        self.main_capacity = max(1, max_entries - self.window_capacity)
+        self.protected_capacity = max(1, int(self.main_capacity * protected_ratio))
+        self._window: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._probation: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._protected: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._sketch = CountMinSketch(max_entries)
+        self.admissions = 0
+        self.rejections = 0
+    
+    def record_access(self, key: Hashable) -> None:
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            # Second hit in the main area: promote, demoting protected overflow back to probation
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self.protected_capacity:
+                demoted = self._protected.popitem(last=False)[0]
+                self._probation[demoted] = None
+    
+    def on_insert(self, key: Hashable) -> List[Hashable]:
+        """Track a new key; returns the keys that must be evicted to stay within bounds"""
+        self._sketch.increment(key)
+        self._window[key] = None
+        if len(self._window) <= self.window_capacity:
+            return []
+        
+        candidate = self._window.popitem(last=False)[0]
+        if len(self._probation) + len(self._protected) < self.main_capacity:
+            self._probation[candidate] = None
+            self.admissions += 1
+            return []
+        
+        victims = self._probation if self._probation else self._protected
+        victim = next(iter(victims))
+        if self._sketch.estimate(candidate) > self._sketch.estimate(victim):
+            del victims[victim]
+            self._probation[candidate] = None
+            self.admissions += 1
+            return [victim]
+        
+        self.rejections += 1
+        return [candidate]
+    
+    def on_remove(self, key: Hashable) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                del segment[key]
+                return
+    
+    def evict_one(self) -> Optional[Hashable]:
+        for segment in (self._probation, self._window, self._protected):
+            if segment:
+                return segment.popitem(last=False)[0]
+        return None
+
+
+EVICTION_POLICIES = {
+    LRUPolicy.name: LRUPolicy,
+    WTinyLFUPolicy.name: WTinyLFUPolicy
+}
+
+
+class MemoryCacheStore:
+    """Dict-backed store bounded by entry count and an approximate byte budget.
+    
+    Expiry times live on the monotonic clock in a min-heap; ``expire()`` reclaims
+    due entries in bounded slices so it can run from a background task without
+    stalling the event loop. Reads still treat an overdue entry as a miss.
+    
+    A key has at most one heap item: rewriting it with a later expiry leaves
+    the item in place, and the item reschedules itself when it comes due.
+    Items of deleted keys are dropped as they are popped, so the heap never
+    needs an O(n) rebuild.
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: int, policy: str = "lru"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown cache eviction policy '{policy}', expected one of {list(EVICTION_POLICIES)}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = EVICTION_POLICIES[policy](max_entries)
+        self._entries: Dict[Hashable, Any] = {}
+        self._sizes: Dict[Hashable, int] = {}
+        self._expires: Dict[Hashable, float] = {}
+        # (due, seq, key); seq breaks ties so keys of different types are never compared
+        self._expiry_heap: List[Tuple[float, int, Hashable]] = []
+        self._heap_seq = itertools.count()
+        # key -> due time of its heap item; other items for the key are superseded
+        self._scheduled: Dict[Hashable, float] = {}
+        self.total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Live value for key (counting as an access), or None"""
+        value = self._entries.get(key)
+        if value is None:
+            return None
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.delete(key)
+            self.expirations += 1
+            return None
+        self.policy.record_access(key)
+        return value
+    
+    def ttl(self, key: Hashable) -> Optional[float]:
+        """Seconds until key expires, or None if it is missing or never expires"""
+        expires_at = self._expires.get(key)
+        if expires_at is None or key not in self._entries:
+            return None
+        return max(0.0, expires_at - time.monotonic())
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a value for ``ttl`` seconds (forever if None); returns False if the eviction policy did not admit it"""
+        if ttl is not None:
+            expires_at = time.monotonic() + ttl
+            self._expires[key] = expires_at
+            scheduled = self._scheduled.get(key)
+            if scheduled is None or expires_at < scheduled:
+                self._scheduled[key] = expires_at
+                heapq.heappush(self._expiry_heap, (expires_at, next(self._heap_seq), key))
+        else:
+            self._expires.pop(key, None)
+        
+        size = estimate_size(value)
+        if key in self._entries:
+            self.total_bytes += size - self._sizes[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.policy.record_access(key)
+        else:
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            for evicted in self.policy.on_insert(key):
+                self._drop(evicted)
+                self.evictions += 1
+        
+        while self.total_bytes > self.max_bytes and self._entries:
+            evicted = self.policy.evict_one()
+            if evicted is None:
+                break
+            self._drop(evicted)
+            self.evictions += 1
+        return key in self._entries
+    
+    def items(self) -> List[Tuple[Hashable, Any, Optional[float]]]:
+        """Live (key, value, remaining ttl) entries, without counting as accesses"""
+        now = time.monotonic()
+        items = []
+        for key, value in self._entries.items():
+            expires_at = self._expires.get(key)
+            if expires_at is None:
+                items.append((key, value, None))
+            elif expires_at > now:
+                items.append((key, value, expires_at - now))
+        return items
+    
+    def delete(self, key: Hashable) -> bool:
+        if key not in self._entries:
+            return False
+        self.policy.on_remove(key)
+        self._drop(key)
+        return True
+    
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self.delete(key)
+        self._expiry_heap.clear()
+        self._scheduled.clear()
+    
+    def expire(self, limit: int = 500) -> int:
+        """Process up to ``limit`` due heap items; returns how many expired entries were removed"""
+        now = time.monotonic()
+        heap = self._expiry_heap
+        reclaimed = popped = 0
+        while heap and heap[0][0] <= now and popped < limit:
+            due, _, key = heapq.heappop(heap)
+            popped += 1
+            if self._scheduled.get(key) != due:
+                continue  # Superseded by an earlier item for the key
+            expires_at = self._expires.get(key)
+            if expires_at is not None and expires_at > now:
+                # Rewritten with a later expiry since the item was pushed
+                self._scheduled[key] = expires_at
+                heapq.heappush(heap, (expires_at, next(self._heap_seq), key))
+                continue
+            del self._scheduled[key]
+            if expires_at is not None:
+                self.delete(key)
+                self.expirations += 1
+                reclaimed += 1
+        return reclaimed
+    
+    def _drop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self._expires.pop(key, None)
+        self.total_bytes -= self._sizes.pop(key, 0)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy.name,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "bytes": self.total_bytes,
+            "bytesPerEntry": round(self.total_bytes / len(self._entries), 1) if self._entries else 0,
+            "maxBytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "admissions": self.policy.admissions,
+            "rejections": self.policy.rejections
+        }
@@ -0,0 +1,131 @@
+"""Per-provider circuit breakers"""
+import time
+from collections import deque
+from enum import Enum
+from typing import Dict, Any, Optional
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure-rate / slow-call circuit breaker with half-open probing.
+    
+    While closed, the outcome of the last ``window_size`` calls is tracked and
+    the breaker opens once either the failure rate or the slow-call rate
+    crosses its threshold. An open breaker rejects calls until
+    ``open_cooldown`` has elapsed, then lets up to ``half_open_max_calls``
+    probes through: if they all succeed it closes again, any failure re-opens it.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_threshold: float = 3.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_cooldown: float = 30.0,
+        half_open_max_calls: int = 2
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = min_calls
+        self.open_cooldown = open_cooldown
+        self.half_open_max_calls = half_open_max_calls
+        
+        self.state = CircuitState.CLOSED
+        self._outcomes = deque(maxlen=window_size)  # (failed, slow) per call
+        self._opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+    
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; reserves a probe slot when half-open"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.open_cooldown:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight + self._probe_successes >= self.half_open_max_calls:
+                return False
+            self._probes_in_flight += 1
+        return True
+    
+    def record_success(self, latency: float) -> None:
+        """Record a call that returned a response"""
+        if self.state == CircuitState.OPEN:
+            # Late outcome of a call started before the breaker opened
+            return
+        slow = latency >= self.slow_call_threshold
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if slow:
+                self._transition(CircuitState.OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition(CircuitState.CLOSED)
+            return
+        
+        self._outcomes.append((False, slow))
+        self._evaluate()
+    
+    def record_failure(self) -> None:
+        """Record a call that raised (transport error, timeout, bad status)"""
+        if self.state == CircuitState.OPEN:
+            # Late outcome of a call started before the breaker opened; must not extend the cooldown
+            return
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._transition(CircuitState.OPEN)
+            return
+        
+        self._outcomes.append((True, False))
+        self._evaluate()
+    
+    def release(self) -> None:
+        """Give back a probe slot for a call that was abandoned without an outcome"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+    
+    def _evaluate(self) -> None:
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failure_rate = sum(1 for failed, _ in self._outcomes if failed) / calls
+        slow_rate = sum(1 for _, slow in self._outcomes if slow) / calls
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._transition(CircuitState.OPEN)
+    
+    def _transition(self, state: CircuitState) -> None:
+        if state == CircuitState.OPEN and self.state == CircuitState.OPEN:
+            return
+        self.state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CircuitState.CLOSED:
+            self._opened_at = None
+            self._outcomes.clear()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current breaker state for health reporting"""
+        calls = len(self._outcomes)
+        data = {
+            "state": self.state.value,
+            "calls": calls,
+            "failureRate": round(sum(1 for failed, _ in self._outcomes if failed) / calls, 3) if calls else 0.0,
+            "slowCallRate": round(sum(1 for _, slow in self._outcomes if slow) / calls, 3) if calls else 0.0
+        }
+        if self.state == CircuitState.OPEN:
+            data["retryInSeconds"] = round(max(0.0, self.open_cooldown - (time.monotonic() - self._opened_at)), 1)
+        return data
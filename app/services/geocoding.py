@@ -1,9 +1,20 @@
 import httpx
 import asyncio
-from typing import Optional, Dict, Any, List
+import importlib.util
+import math
+import random
+import time
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import structlog
 from app.config import settings
+from app.services.provider_stats import ProviderStats
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+from app.services.rate_limiter import TokenBucket
+from app.services.admin_boundaries import get_admin_boundary_index
+from app.services.address_points import get_address_point_index
+from app.utils.deadline import Deadline
+from app.models.request import DetailLevel
 from app.models.response import (
     Address, AddressComponents, CoordinatesResponse, 
     AccuracyLevel, PlaceType, Metadata, LocationData, LocationResponse
@@ -11,65 +22,228 @@ from app.models.response import (
 
 logger = structlog.get_logger()
 
+# HTTP/2 needs the optional ``h2`` package (installed via ``httpx[http2]``)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+PROVIDERS = ("google_maps", "mapbox", "nominatim")
+# Offline sources answered from in-process datasets; cheaper than a cache round trip
+LOCAL_SOURCES = ("address_points", "admin_boundaries")
+
+PROVIDER_NAMES = {
+    "google_maps": "Google Maps",
+    "mapbox": "Mapbox",
+    "nominatim": "Nominatim"
+}
+
+# Breaker state is module-level so it survives per-request service instances
+# in the serverless handler, like the in-memory cache store
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Get (or create) the shared circuit breaker for a provider"""
+    breaker = _circuit_breakers.get(provider)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            provider,
+            failure_rate_threshold=settings.CIRCUIT_FAILURE_RATE_THRESHOLD,
+            slow_call_threshold=settings.CIRCUIT_SLOW_CALL_THRESHOLD_MS / 1000,
+            slow_call_rate_threshold=settings.CIRCUIT_SLOW_CALL_RATE_THRESHOLD,
+            window_size=settings.CIRCUIT_WINDOW_SIZE,
+            min_calls=settings.CIRCUIT_MIN_CALLS,
+            open_cooldown=settings.CIRCUIT_OPEN_COOLDOWN_SECONDS,
+            half_open_max_calls=settings.CIRCUIT_HALF_OPEN_MAX_CALLS
+        )
+        _circuit_breakers[provider] = breaker
+    return breaker
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+def get_rate_limiter(provider: str) -> Optional[TokenBucket]:
+    """Get (or create) the shared outbound token bucket for a provider, if it is rate limited"""
+    rate = settings.PROVIDER_RATE_LIMITS.get(provider)
+    if not rate:
+        return None
+    bucket = _rate_limiters.get(provider)
+    if bucket is None:
+        bucket = TokenBucket(
+            rate=rate,
+            capacity=settings.PROVIDER_RATE_BURST.get(provider, 1),
+            max_waiters=settings.RATE_LIMIT_MAX_WAITERS,
+            max_wait=settings.RATE_LIMIT_MAX_WAIT_MS / 1000
+        )
+        _rate_limiters[provider] = bucket
+    return bucket
+
+# In-flight call limits per provider. asyncio primitives belong to one event
+# loop, so a provider's semaphore is replaced when the loop changes (the
+# serverless handler runs a new loop per request)
+_concurrency_limits: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+def get_concurrency_limit(provider: str) -> Optional[asyncio.Semaphore]:
+    """Get (or create) the semaphore bounding concurrent calls to a provider, if it is limited"""
+    limit = settings.PROVIDER_MAX_CONCURRENCY.get(provider)
+    if not limit:
+        return None
+    loop = asyncio.get_running_loop()
+    entry = _concurrency_limits.get(provider)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, asyncio.Semaphore(limit))
+        _concurrency_limits[provider] = entry
+    return entry[1]
+
+# Rolling provider statistics, keyed by (provider, country code or None)
+_provider_stats: Dict[Tuple[str, Optional[str]], ProviderStats] = {}
+
+# Last country seen per 1x1 degree cell, so stats can be keyed by country
+# before the provider has answered
+_country_hints: Dict[Tuple[int, int], str] = {}
+
+def get_provider_stats(provider: str, country: Optional[str] = None) -> ProviderStats:
+    """Get (or create) the shared statistics for a provider, globally or for one country"""
+    key = (provider, country)
+    stats = _provider_stats.get(key)
+    if stats is None:
+        stats = ProviderStats(settings.LATENCY_WINDOW_SIZE)
+        _provider_stats[key] = stats
+    return stats
+
+def _country_cell(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat), math.floor(lng)
+
 class GeocodingService:
     def __init__(self):
         self.google_maps_url = "https://maps.googleapis.com/maps/api/geocode/json"
         self.mapbox_url = "https://api.mapbox.com/geocoding/v5/mapbox.places"
         self.nominatim_url = "https://nominatim.openstreetmap.org/reverse"
         self.timeout = settings.EXTERNAL_API_TIMEOUT
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def _get_client(self, provider: str) -> httpx.AsyncClient:
+        """Get the long-lived pooled client for a provider, creating it lazily"""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self._clients[provider] = client
+        return client
+    
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        """Create a keep-alive client with its own connection pool"""
+        http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+        if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1", provider=provider)
+        
+        headers = {}
+        if provider == "nominatim":
+            headers["User-Agent"] = f"{settings.APP_NAME}/{settings.APP_VERSION}"
+        
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=http2,
+            headers=headers,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    
+    async def startup(self) -> None:
+        """Open the provider connection pools and load local datasets ahead of the first request"""
+        get_admin_boundary_index()
+        get_address_point_index()
+        for provider in PROVIDERS:
+            self._get_client(provider)
+        logger.info("Geocoding HTTP clients started", providers=list(self._clients), http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE)
+    
+    async def close(self) -> None:
+        """Close all provider connection pools"""
+        clients, self._clients = self._clients, {}
+        for provider, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Failed to close HTTP client", provider=provider, error=str(e))
     
     async def reverse_geocode(
         self, 
         lat: float, 
         lng: float, 
-        language: str = "en"
+        language: str = "en",
+        deadline: Optional[Deadline] = None,
+        detail: DetailLevel = DetailLevel.STREET,
+        wait_for_limits: bool = False
     ) -> LocationResponse:
-        """Main reverse geocoding with fallback strategy"""
+        """Main reverse geocoding with fallback strategy.
+        
+        When a deadline is given, each provider attempt only gets the budget that
+        is left, and the chain stops as soon as the budget runs out. Locality-level
+        requests are answered from the offline admin boundaries when possible,
+        which also serve as the last resort when every remote provider fails.
+        ``wait_for_limits`` makes provider calls queue for their rate limits
+        rather than be skipped (see ``_call_provider``).
+        """
         start_time = datetime.utcnow()
         
-        # Try Google Maps first
-        if settings.GOOGLE_MAPS_API_KEY:
-            try:
-                result = await self._google_maps_reverse_geocode(lat, lng, language)
-                if result:
-                    processing_time = self._calculate_processing_time(start_time)
-                    location_data = self._create_location_data(result, "google_maps", processing_time)
-                    return LocationResponse(
-                        success=True,
-                        data=location_data,
-                        coordinates={"latitude": lat, "longitude": lng}
-                    )
-            except Exception as e:
-                logger.warning("Google Maps API failed", error=str(e))
+        if detail == DetailLevel.LOCALITY:
+            result = self._admin_boundaries_lookup(lat, lng, language)
+            if result:
+                return self._build_response(result, "admin_boundaries", start_time, lat, lng)
         
-        # Try Mapbox as fallback
-        if settings.MAPBOX_ACCESS_TOKEN:
-            try:
-                result = await self._mapbox_reverse_geocode(lat, lng, language)
-                if result:
-                    processing_time = self._calculate_processing_time(start_time)
-                    location_data = self._create_location_data(result, "mapbox", processing_time)
-                    return LocationResponse(
-                        success=True,
-                        data=location_data,
-                        coordinates={"latitude": lat, "longitude": lng}
-                    )
-            except Exception as e:
-                logger.warning("Mapbox API failed", error=str(e))
+        result = self._address_points_lookup(lat, lng, language)
+        if result:
+            return self._build_response(result, "address_points", start_time, lat, lng)
         
-        # Try Nominatim as final fallback
-        try:
-            result = await self._nominatim_reverse_geocode(lat, lng, language)
-            if result:
-                processing_time = self._calculate_processing_time(start_time)
-                location_data = self._create_location_data(result, "nominatim", processing_time)
-                return LocationResponse(
-                    success=True,
-                    data=location_data,
-                    coordinates={"latitude": lat, "longitude": lng}
-                )
-        except Exception as e:
-            logger.warning("Nominatim API failed", error=str(e))
+        country = _country_hints.get(_country_cell(lat, lng))
+        chain = self._provider_chain(country)
+        
+        outcomes: List[str] = []
+        if settings.HEDGING_ENABLED and len(chain) > 1:
+            outcome = await self._hedged_geocode(chain, lat, lng, language, country, deadline, outcomes, wait_for_limits)
+        else:
+            outcome = await self._sequential_geocode(chain, lat, lng, language, country, deadline, outcomes, wait_for_limits)
+        
+        if outcome:
+            provider, result = outcome
+            return self._build_response(result, provider, start_time, lat, lng)
+        
+        result = self._admin_boundaries_lookup(lat, lng, language)
+        if result:
+            logger.info("Remote providers failed, answered from admin boundaries", lat=lat, lng=lng)
+            return self._build_response(result, "admin_boundaries", start_time, lat, lng)
+        
+        if deadline and deadline.expired:
+            logger.warning("Geocoding deadline exceeded", budget=deadline.budget, lat=lat, lng=lng)
+            return LocationResponse(
+                success=False,
+                error={
+                    "code": "DEADLINE_EXCEEDED",
+                    "message": "Geocoding did not complete within the response time budget"
+                },
+                coordinates={"latitude": lat, "longitude": lng}
+            )
+        
+        # No provider was actually called (open circuits, local rate or concurrency
+        # limits); says nothing about the location, so it must not be cached
+        if not any(result != "skipped" for result in outcomes):
+            return LocationResponse(
+                success=False,
+                error={
+                    "code": "PROVIDERS_UNAVAILABLE",
+                    "message": "No geocoding provider is available right now"
+                },
+                coordinates={"latitude": lat, "longitude": lng}
+            )
+        
+        # Every provider answered, and none has an address here (e.g. open ocean)
+        if outcomes and all(result == "no_result" for result in outcomes):
+            return LocationResponse(
+                success=False,
+                error={
+                    "code": "NO_RESULT",
+                    "message": "No address found at these coordinates"
+                },
+                coordinates={"latitude": lat, "longitude": lng}
+            )
         
         # All services failed
         return LocationResponse(
@@ -81,7 +255,320 @@ class GeocodingService:
             coordinates={"latitude": lat, "longitude": lng}
         )
     
-    async def _google_maps_reverse_geocode(self, lat: float, lng: float, language: str) -> Optional[Dict[str, Any]]:
+    def _build_response(
+        self, 
+        result: Dict[str, Any], 
+        source: str, 
+        start_time: datetime, 
+        lat: float, 
+        lng: float
+    ) -> LocationResponse:
+        """Wrap a provider result in a successful LocationResponse"""
+        processing_time = self._calculate_processing_time(start_time)
+        location_data = self._create_location_data(result, source, processing_time)
+        country_code = location_data.address.components.countryCode
+        if country_code:
+            _country_hints[_country_cell(lat, lng)] = country_code
+        return LocationResponse(
+            success=True,
+            data=location_data,
+            coordinates={"latitude": lat, "longitude": lng}
+        )
+    
+    def _admin_boundaries_lookup(self, lat: float, lng: float, language: str) -> Optional[Dict[str, Any]]:
+        """Offline admin-boundary lookup; None when no dataset is loaded or nothing matches"""
+        index = get_admin_boundary_index()
+        if index is None:
+            return None
+        try:
+            return index.lookup(lat, lng, language)
+        except Exception as e:
+            logger.warning("Admin boundary lookup failed", error=str(e))
+            return None
+    
+    def _address_points_lookup(self, lat: float, lng: float, language: str) -> Optional[Dict[str, Any]]:
+        """Nearest local address point, with country/state filled in from admin boundaries when loaded"""
+        index = get_address_point_index()
+        if index is None:
+            return None
+        try:
+            result = index.lookup(lat, lng, settings.ADDRESS_POINTS_MAX_DISTANCE_M)
+        except Exception as e:
+            logger.warning("Address point lookup failed", error=str(e))
+            return None
+        
+        if result:
+            admin = self._admin_boundaries_lookup(lat, lng, language)
+            if admin:
+                result["components"] = {**admin["components"], **result["components"]}
+        return result
+    
+    def _enabled_providers(self) -> List[str]:
+        """Configured providers in static fallback order (Google -> Mapbox -> Nominatim)"""
+        chain = []
+        if settings.GOOGLE_MAPS_API_KEY:
+            chain.append("google_maps")
+        if settings.MAPBOX_ACCESS_TOKEN:
+            chain.append("mapbox")
+        chain.append("nominatim")
+        return chain
+    
+    def _provider_chain(self, country: Optional[str] = None) -> List[str]:
+        """Providers to try, adaptively ranked when enabled"""
+        if not settings.ADAPTIVE_ORDERING_ENABLED:
+            return self._enabled_providers()
+        ranking = self.rank_providers(country)
+        chain = [entry["provider"] for entry in ranking]
+        
+        # Ranked-down providers would otherwise only be sampled as fallbacks and
+        # never recover; send a small share of traffic to one of them first
+        if len(chain) > 1 and random.random() < settings.ADAPTIVE_EXPLORATION_RATE:
+            peers = [entry["provider"] for entry in ranking[1:] if entry["tier"] == ranking[0]["tier"]]
+            if peers:
+                explored = random.choice(peers)
+                chain.remove(explored)
+                chain.insert(0, explored)
+        return chain
+    
+    def rank_providers(self, country: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rank enabled providers by priority tier, then expected latency plus weighted cost.
+        
+        Country-level statistics are used once they have enough samples, otherwise
+        the global ones. Providers without enough samples score 0 so they get
+        explored before being ranked on real numbers.
+        """
+        ranking = []
+        for position, provider in enumerate(self._enabled_providers()):
+            stats, scope = get_provider_stats(provider), "global"
+            if country and settings.ADAPTIVE_PER_COUNTRY:
+                country_stats = get_provider_stats(provider, country)
+                if country_stats.samples >= settings.ADAPTIVE_MIN_SAMPLES:
+                    stats, scope = country_stats, country
+            
+            cost = settings.PROVIDER_COSTS.get(provider, 0.0)
+            expected_ms = stats.expected_latency_ms()
+            if stats.samples < settings.ADAPTIVE_MIN_SAMPLES or expected_ms is None:
+                score = 0.0
+            else:
+                score = expected_ms + cost * settings.PROVIDER_COST_WEIGHT_MS
+            
+            ranking.append({
+                "provider": provider,
+                "tier": settings.PROVIDER_PRIORITY_TIERS.get(provider, 0),
+                "score": round(score, 1),
+                "expectedLatencyMs": round(expected_ms, 1) if expected_ms is not None else None,
+                "cost": cost,
+                "scope": scope,
+                "stats": stats.snapshot(),
+                "_position": position
+            })
+        
+        ranking.sort(key=lambda entry: (entry["tier"], entry["score"], entry["_position"]))
+        for entry in ranking:
+            del entry["_position"]
+        return ranking
+    
+    async def _call_provider(
+        self, 
+        provider: str, 
+        lat: float, 
+        lng: float, 
+        language: str, 
+        country: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        outcomes: Optional[List[str]] = None,
+        wait_for_limits: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Call a single provider and record its latency; failures are logged and return None.
+        
+        Appends the call's outcome to ``outcomes`` when given: "no_result" when the
+        provider answered but had no address, "error" when the call failed, and
+        "skipped" when it was not made (open circuit, rate or concurrency limit, deadline).
+        
+        With ``wait_for_limits`` (background jobs) the call queues for the rate
+        limit for as long as its deadline allows, instead of being skipped after
+        ``RATE_LIMIT_MAX_WAIT_MS``.
+        """
+        if outcomes is None:
+            outcomes = []
+        handlers = {
+            "google_maps": self._google_maps_reverse_geocode,
+            "mapbox": self._mapbox_reverse_geocode,
+            "nominatim": self._nominatim_reverse_geocode
+        }
+        breaker = get_circuit_breaker(provider) if settings.CIRCUIT_BREAKER_ENABLED else None
+        if breaker and not breaker.allow_request():
+            logger.debug("Circuit open, skipping provider", provider=provider)
+            outcomes.append("skipped")
+            return None
+        
+        limiter = get_rate_limiter(provider)
+        try:
+            acquired = limiter is None or await limiter.acquire(
+                deadline.remaining() if deadline else None,
+                patient=wait_for_limits
+            )
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release()
+            raise
+        if not acquired:
+            if breaker:
+                breaker.release()
+            logger.info("Provider rate limit wait too long, skipping provider", provider=provider)
+            outcomes.append("skipped")
+            return None
+        
+        concurrency = get_concurrency_limit(provider)
+        if concurrency is not None:
+            try:
+                await asyncio.wait_for(concurrency.acquire(), deadline.remaining() if deadline else None)
+            except asyncio.TimeoutError:
+                if breaker:
+                    breaker.release()
+                logger.info("Provider concurrency limit wait too long, skipping provider", provider=provider)
+                outcomes.append("skipped")
+                return None
+            except asyncio.CancelledError:
+                if breaker:
+                    breaker.release()
+                raise
+        
+        try:
+            timeout = self.timeout if deadline is None else min(self.timeout, deadline.remaining())
+            if timeout <= 0:
+                if breaker:
+                    breaker.release()
+                outcomes.append("skipped")
+                return None
+            
+            started = time.monotonic()
+            try:
+                # httpx applies the timeout to each phase (connect, write, read, pool),
+                # so bound the whole call as well to keep it within the deadline
+                result = await asyncio.wait_for(handlers[provider](lat, lng, language, timeout), timeout)
+            except asyncio.CancelledError:
+                if breaker:
+                    breaker.release()
+                raise
+            except Exception as e:
+                if breaker:
+                    breaker.record_failure()
+                self._record_stats(provider, country, False, time.monotonic() - started)
+                logger.warning(f"{PROVIDER_NAMES[provider]} API failed", error=str(e))
+                outcomes.append("error")
+                return None
+            
+            latency = time.monotonic() - started
+            if breaker:
+                breaker.record_success(latency)
+            self._record_stats(provider, country, bool(result), latency)
+            outcomes.append("ok" if result else "no_result")
+            return result
+        finally:
+            if concurrency is not None:
+                concurrency.release()
+    
+    def _record_stats(self, provider: str, country: Optional[str], success: bool, latency: float) -> None:
+        get_provider_stats(provider).record(success, latency)
+        if country and settings.ADAPTIVE_PER_COUNTRY:
+            get_provider_stats(provider, country).record(success, latency)
+    
+    async def _sequential_geocode(
+        self, 
+        chain: List[str], 
+        lat: float, 
+        lng: float, 
+        language: str, 
+        country: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        outcomes: Optional[List[str]] = None,
+        wait_for_limits: bool = False
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Try each provider in turn until one answers"""
+        for provider in chain:
+            if deadline and deadline.expired:
+                break
+            result = await self._call_provider(provider, lat, lng, language, country, deadline, outcomes, wait_for_limits)
+            if result:
+                return provider, result
+        return None
+    
+    async def _hedged_geocode(
+        self, 
+        chain: List[str], 
+        lat: float, 
+        lng: float, 
+        language: str, 
+        country: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        outcomes: Optional[List[str]] = None,
+        wait_for_limits: bool = False
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Race providers: start the next one when the current one is slow or fails.
+        
+        The first good answer wins and every other in-flight call is cancelled.
+        """
+        remaining = list(chain)
+        in_flight: Dict[asyncio.Task, str] = {}
+        
+        def launch() -> str:
+            provider = remaining.pop(0)
+            task = asyncio.create_task(self._call_provider(provider, lat, lng, language, country, deadline, outcomes, wait_for_limits))
+            in_flight[task] = provider
+            return provider
+        
+        latest = launch()
+        try:
+            while in_flight:
+                delay = self._hedge_delay(latest) if remaining else None
+                if deadline:
+                    delay = deadline.remaining() if delay is None else min(delay, deadline.remaining())
+                done, _ = await asyncio.wait(
+                    in_flight.keys(), 
+                    timeout=delay, 
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    if deadline and deadline.expired:
+                        return None
+                    latest = launch()
+                    logger.info("Hedging slow provider", waiting_on=list(in_flight.values())[:-1], hedge=latest)
+                    continue
+                
+                for task in done:
+                    provider = in_flight.pop(task)
+                    result = task.result()
+                    if result:
+                        return provider, result
+                
+                # Every finished call failed; move on without waiting for the delay
+                if remaining and not in_flight:
+                    latest = launch()
+            return None
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    def _hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on a provider before hedging, from its latency percentile"""
+        window = get_provider_stats(provider).latency
+        if len(window) < settings.HEDGE_MIN_SAMPLES:
+            delay_ms = settings.HEDGE_DELAY_DEFAULT_MS
+        else:
+            delay_ms = window.percentile(settings.HEDGE_DELAY_PERCENTILE) * 1000
+        return max(delay_ms, settings.HEDGE_DELAY_MIN_MS) / 1000
+    
+    async def _google_maps_reverse_geocode(
+        self, 
+        lat: float, 
+        lng: float, 
+        language: str, 
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
         """Google Maps reverse geocoding"""
         params = {
             "latlng": f"{lat},{lng}",
@@ -89,16 +576,24 @@ class GeocodingService:
             "language": language
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(self.google_maps_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] == "OK" and data["results"]:
-                return data["results"][0]
+        client = self._get_client("google_maps")
+        response = await client.get(self.google_maps_url, params=params, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data["status"] == "OK" and data["results"]:
+            return data["results"][0]
+        if data["status"] != "ZERO_RESULTS":
+            raise ValueError(f"Google Maps returned status {data['status']}")
         return None
     
-    async def _mapbox_reverse_geocode(self, lat: float, lng: float, language: str) -> Optional[Dict[str, Any]]:
+    async def _mapbox_reverse_geocode(
+        self, 
+        lat: float, 
+        lng: float, 
+        language: str, 
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
         """Mapbox reverse geocoding"""
         url = f"{self.mapbox_url}/{lng},{lat}.json"
         params = {
@@ -106,16 +601,22 @@ class GeocodingService:
             "language": language
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data["features"]:
-                return data["features"][0]
+        client = self._get_client("mapbox")
+        response = await client.get(url, params=params, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data["features"]:
+            return data["features"][0]
         return None
     
-    async def _nominatim_reverse_geocode(self, lat: float, lng: float, language: str) -> Optional[Dict[str, Any]]:
+    async def _nominatim_reverse_geocode(
+        self, 
+        lat: float, 
+        lng: float, 
+        language: str, 
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
         """Nominatim reverse geocoding"""
         params = {
             "lat": lat,
@@ -125,17 +626,14 @@ class GeocodingService:
             "accept-language": language
         }
         
-        headers = {
-            "User-Agent": f"{settings.APP_NAME}/{settings.APP_VERSION}"
-        }
+        client = self._get_client("nominatim")
+        response = await client.get(self.nominatim_url, params=params, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        data = response.json()
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(self.nominatim_url, params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data:
-                return data
+        # Points without an address (e.g. at sea) come back as {"error": "Unable to geocode"}
+        if data and "error" not in data:
+            return data
         return None
     
     def _create_location_data(self, raw_data: Dict[str, Any], source: str, processing_time: str) -> LocationData:
@@ -148,10 +646,23 @@ class GeocodingService:
             components, formatted_address = self._parse_nominatim_response(raw_data)
         elif source == "mapbox":
             components, formatted_address = self._parse_mapbox_response(raw_data)
+        elif source == "admin_boundaries":
+            components, formatted_address = self._parse_admin_boundaries_response(raw_data)
+        elif source == "address_points":
+            components, formatted_address = self._parse_address_points_response(raw_data)
         else:
             components = AddressComponents()
             formatted_address = "Address not available"
         
+        place_type = self._infer_place_type(components)
+        accuracy = AccuracyLevel.MEDIUM
+        if source == "admin_boundaries":
+            place_type = PlaceType.LOCALITY if components.city else PlaceType.ADMINISTRATIVE
+            accuracy = AccuracyLevel.APPROXIMATE
+        elif source == "address_points":
+            place_type = PlaceType.STREET_ADDRESS
+            accuracy = AccuracyLevel.HIGH
+        
         address = Address(
             fullAddress=formatted_address,
             formattedAddress=formatted_address,
@@ -160,9 +671,9 @@ class GeocodingService:
             coordinates=CoordinatesResponse(
                 latitude=0.0,
                 longitude=0.0,
-                accuracy=AccuracyLevel.MEDIUM
+                accuracy=accuracy
             ),
-            placeType=PlaceType.LOCALITY,
+            placeType=place_type,
             confidence=0.8
         )
         
@@ -178,6 +689,15 @@ class GeocodingService:
             metadata=metadata
         )
     
+    @staticmethod
+    def _infer_place_type(components: AddressComponents) -> PlaceType:
+        """Most specific place type the parsed components support"""
+        if components.houseNumber or components.street:
+            return PlaceType.STREET_ADDRESS
+        if components.locality or components.subLocality or components.city:
+            return PlaceType.LOCALITY
+        return PlaceType.ADMINISTRATIVE
+    
     def _parse_google_maps_response(self, data: Dict[str, Any]) -> tuple:
         """Parse Google Maps API response"""
         formatted_address = data.get("formatted_address", "Address not available")
@@ -267,12 +787,50 @@ class GeocodingService:
         components = AddressComponents(**components_data)
         return components, formatted_address
     
+    def _parse_admin_boundaries_response(self, data: Dict[str, Any]) -> tuple:
+        """Parse an offline admin-boundary lookup"""
+        components = AddressComponents(**data.get("components", {}))
+        parts = [components.city, components.district, components.state, components.country]
+        formatted_address = ", ".join(part for part in parts if part) or "Address not available"
+        return components, formatted_address
+    
+    def _parse_address_points_response(self, data: Dict[str, Any]) -> tuple:
+        """Parse a local address-point match"""
+        components = AddressComponents(**data.get("components", {}))
+        street = " ".join(part for part in [components.houseNumber, components.street] if part)
+        region = " ".join(part for part in [components.state, components.pincode] if part)
+        parts = [street, components.city, region, components.country]
+        formatted_address = ", ".join(part for part in parts if part) or "Address not available"
+        return components, formatted_address
+    
     def _calculate_processing_time(self, start_time: datetime) -> str:
         """Calculate processing time"""
         end_time = datetime.utcnow()
         duration = (end_time - start_time).total_seconds()
         return f"{duration:.3f}s"
     
+    def provider_status(self) -> Dict[str, Any]:
+        """Per-provider availability and circuit breaker state"""
+        chain = self._enabled_providers()
+        status = {}
+        for provider in PROVIDERS:
+            status[provider] = {"enabled": provider in chain}
+            if settings.CIRCUIT_BREAKER_ENABLED:
+                status[provider]["circuit"] = get_circuit_breaker(provider).snapshot()
+            limiter = get_rate_limiter(provider)
+            if limiter:
+                status[provider]["rateLimit"] = limiter.snapshot()
+        return status
+    
+    def is_degraded(self) -> bool:
+        """True when every enabled provider has an open circuit"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return False
+        return all(
+            get_circuit_breaker(provider).state == CircuitState.OPEN 
+            for provider in self._enabled_providers()
+        )
+    
     async def health_check(self) -> bool:
         """Check if geocoding services are available"""
         try:
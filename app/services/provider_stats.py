@@ -0,0 +1,89 @@
+"""Rolling per-provider statistics used to steer the fallback chain"""
+import math
+from collections import deque
+from typing import Optional, Dict, Any, Sequence
+
+# Upper bounds (ms) of the latency histogram buckets exposed for inspection
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyWindow:
+    """Fixed-size window of the most recent latency samples (seconds)"""
+    
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def record(self, latency: float) -> None:
+        """Add a latency sample, dropping the oldest once the window is full"""
+        self._samples.append(latency)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None when empty"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+    
+    def mean(self) -> Optional[float]:
+        """Mean latency of the window, or None when empty"""
+        if not self._samples:
+            return None
+        return sum(self._samples) / len(self._samples)
+    
+    def histogram(self, buckets_ms: Sequence[int] = LATENCY_BUCKETS_MS) -> Dict[str, int]:
+        """Sample counts per latency bucket, keyed by the bucket's upper bound"""
+        counts = {f"le_{bound}ms": 0 for bound in buckets_ms}
+        counts["gt_max"] = 0
+        for sample in self._samples:
+            sample_ms = sample * 1000
+            for bound in buckets_ms:
+                if sample_ms <= bound:
+                    counts[f"le_{bound}ms"] += 1
+                    break
+            else:
+                counts["gt_max"] += 1
+        return counts
+
+
+class ProviderStats:
+    """Rolling latency and success statistics for one provider (optionally in one country)"""
+    
+    def __init__(self, window_size: int = 200):
+        self.latency = LatencyWindow(window_size)
+        self._outcomes = deque(maxlen=window_size)
+    
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+    
+    def record(self, success: bool, latency: float) -> None:
+        """Record one completed call; a call that returned no address counts as unsuccessful"""
+        self._outcomes.append(success)
+        self.latency.record(latency)
+    
+    def success_rate(self) -> float:
+        """Laplace-smoothed success rate so a provider is never scored as certain to fail"""
+        return (sum(self._outcomes) + 1) / (len(self._outcomes) + 2)
+    
+    def expected_latency_ms(self) -> Optional[float]:
+        """Expected time to a usable answer when this provider is tried first"""
+        mean = self.latency.mean()
+        if mean is None:
+            return None
+        return mean * 1000 / self.success_rate()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Statistics for inspection"""
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "samples": self.samples,
+            "successRate": round(self.success_rate(), 3),
+            "p50Ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95Ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "histogram": self.latency.histogram()
+        }
@@ -0,0 +1,92 @@
+"""Async token-bucket pacing for outbound provider calls"""
+import asyncio
+import math
+import time
+from typing import Dict, Any, Optional
+
+
+class TokenBucket:
+    """Token bucket that lets callers wait their turn, within limits.
+    
+    A caller that cannot take a token right away reserves the next one and
+    sleeps until it is due. Callers are turned away immediately, without
+    waiting, when the wait would exceed ``max_wait`` (or their own timeout)
+    or when ``max_waiters`` callers are already queued.
+    """
+    
+    def __init__(self, rate: float, capacity: float, max_waiters: int = 50, max_wait: float = 2.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters = 0
+        self.rejected = 0
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, timeout: Optional[float] = None, patient: bool = False) -> bool:
+        """Take a token, waiting at most ``min(max_wait, timeout)`` seconds.
+        
+        Returns False, without waiting, if the token cannot be had in time.
+        ``patient`` callers (background work that should be paced rather than
+        turned away) are only bounded by their own timeout, not by ``max_wait``
+        or ``max_waiters``, and only ever take tokens nobody has reserved.
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        if patient:
+            return await self._acquire_patient(timeout)
+        
+        max_wait = self.max_wait if timeout is None else min(self.max_wait, timeout)
+        wait = (1 - self._tokens) / self.rate
+        if wait > max_wait or self._waiters >= self.max_waiters:
+            self.rejected += 1
+            return False
+        
+        # Reserve the token now so later callers queue behind this one
+        self._tokens -= 1
+        self._waiters += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self._tokens += 1
+            raise
+        finally:
+            self._waiters -= 1
+        return True
+    
+    async def _acquire_patient(self, timeout: Optional[float]) -> bool:
+        """Wait for a free token without reserving ahead.
+        
+        Reserving would push the bucket into debt that every interactive caller
+        then has to wait out, so patient callers sleep until a token should be
+        free and try again, and interactive reservations always go first.
+        """
+        deadline = math.inf if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = (1 - self._tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                self.rejected += 1
+                return False
+            await asyncio.sleep(wait)
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current bucket state for inspection"""
+        self._refill()
+        return {
+            "ratePerSecond": self.rate,
+            "tokens": round(max(self._tokens, 0.0), 2),
+            "waiters": self._waiters,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,240 @@
+"""Redis cache backend shared by every worker and serverless instance"""
+import asyncio
+import json
+import math
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+import structlog
+from app.config import settings
+from app.services.cache_backends import CacheBackend, json_default
+from app.services.cache_keys import CacheKey, REDIS_PREFIX, key_bytes, key_from_bytes
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # Optional: CACHE_BACKEND=redis falls back to memory without it
+    aioredis = None
+    RedisError = Exception
+
+logger = structlog.get_logger()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis backend with a pooled async client, native TTLs (SETEX) and pipelined multi-key operations.
+    
+    Every operation is bounded by ``REDIS_TIMEOUT_MS``; on timeout or any Redis
+    error it degrades to a cache miss (or a failed write) instead of raising.
+    """
+    
+    name = "redis"
+    
+    def __init__(self, url: str, codec=None):
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for the Redis cache backend")
+        self.url = url
+        self.codec = codec
+        self.timeout = settings.REDIS_TIMEOUT_MS / 1000
+        self._client = None
+        self._loop = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+    
+    def _get_client(self):
+        """Pooled client bound to the running event loop.
+        
+        The serverless handler runs each request in a fresh event loop, and
+        pooled connections cannot cross loops, so the pool is rebuilt when the
+        loop changes.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = aioredis.Redis(
+                connection_pool=aioredis.ConnectionPool.from_url(
+                    self.url,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    socket_connect_timeout=self.timeout,
+                    socket_timeout=self.timeout
+                )
+            )
+            self._loop = loop
+        return self._client
+    
+    async def _run(self, operation: str, coro):
+        """Await a Redis call within the timeout; returns None on timeout or error"""
+        try:
+            return await asyncio.wait_for(coro, timeout=self.timeout)
+        except (asyncio.TimeoutError, RedisError, OSError) as e:
+            self.errors += 1
+            logger.warning("Redis cache unavailable, degrading to miss", operation=operation, error=str(e) or type(e).__name__)
+            return None
+    
+    def _encode(self, value: Dict[str, Any]) -> bytes:
+        if self.codec is not None:
+            return self.codec.encode(value)
+        return json.dumps(value, default=json_default, separators=(",", ":")).encode()
+    
+    def _decode(self, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        if raw is None:
+            return None
+        try:
+            return self.codec.decode(raw) if self.codec is not None else json.loads(raw)
+        except Exception as e:
+            logger.warning("Undecodable cache entry, treating as miss", error=str(e))
+            return None
+    
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        raw = await self._run("get", self._get_client().get(key_bytes(key)))
+        value = self._decode(raw)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: CacheKey, value: Dict[str, Any], ttl: Optional[float]) -> bool:
+        client = self._get_client()
+        if ttl is None:
+            coro = client.set(key_bytes(key), self._encode(value))
+        else:
+            coro = client.setex(key_bytes(key), max(1, math.ceil(ttl)), self._encode(value))
+        return bool(await self._run("set", coro))
+    
+    async def delete(self, key: CacheKey) -> bool:
+        return bool(await self._run("delete", self._get_client().delete(key_bytes(key))))
+    
+    async def get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        if not keys:
+            return {}
+        raws = await self._run("mget", self._get_client().mget([key_bytes(key) for key in keys]))
+        if raws is None:
+            self.misses += len(keys)
+            return {}
+        results = {}
+        for key, raw in zip(keys, raws):
+            value = self._decode(raw)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                results[key] = value
+        return results
+    
+    async def set_many(self, items: List[Tuple[CacheKey, Dict[str, Any], Optional[float]]]) -> int:
+        if not items:
+            return 0
+        pipe = self._get_client().pipeline(transaction=False)
+        for key, value, ttl in items:
+            if ttl is None:
+                pipe.set(key_bytes(key), self._encode(value))
+            else:
+                pipe.setex(key_bytes(key), max(1, math.ceil(ttl)), self._encode(value))
+        results = await self._run("pipeline_set", pipe.execute())
+        return sum(1 for result in results if result) if results else 0
+    
+    async def clear(self) -> None:
+        """Remove every cached location key (only this service's keys, not the whole database)"""
+        client = self._get_client()
+        
+        async def _clear():
+            batch = []
+            async for key in self._scan_keys(client):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    await client.unlink(*batch)
+                    batch = []
+            if batch:
+                await client.unlink(*batch)
+        
+        try:
+            await _clear()
+        except (RedisError, OSError) as e:
+            logger.warning("Redis cache clear failed", error=str(e))
+    
+    @staticmethod
+    async def _scan_keys(client) -> AsyncIterator[bytes]:
+        """Every location key: packed keys, plus string keys for unpackable languages or precisions"""
+        for pattern in (REDIS_PREFIX + b"*", b"location:*"):
+            async for key in client.scan_iter(match=pattern, count=1000):
+                yield key
+    
+    async def scan(self) -> AsyncIterator[Tuple[CacheKey, Dict[str, Any], Optional[float]]]:
+        """Every cached location with its remaining TTL, fetched in pipelined batches"""
+        client = self._get_client()
+        keys = []
+        async for key in self._scan_keys(client):
+            keys.append(key)
+            if len(keys) >= 500:
+                for item in await self._scan_batch(client, keys):
+                    yield item
+                keys = []
+        if keys:
+            for item in await self._scan_batch(client, keys):
+                yield item
+    
+    async def _scan_batch(self, client, keys: List[bytes]) -> List[Tuple[CacheKey, Dict[str, Any], Optional[float]]]:
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.pttl(key)
+        results = await pipe.execute()
+        items = []
+        for i, key in enumerate(keys):
+            raw, pttl = results[2 * i], results[2 * i + 1]
+            if raw is None or pttl == -2:
+                continue  # Expired between SCAN and GET
+            items.append((key_from_bytes(key), self._decode(raw), pttl / 1000 if pttl >= 0 else None))
+        return items
+    
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        await self._run("publish", self._get_client().publish(channel, self._encode(message)))
+    
+    async def listen(self, channel: str, handler) -> None:
+        """Deliver pub/sub messages to handler until cancelled, reconnecting after errors.
+        
+        Uses its own connection without the pool's short socket timeout, since a
+        subscriber blocks on reads for as long as the channel is quiet.
+        """
+        while True:
+            client = aioredis.Redis.from_url(self.url, socket_connect_timeout=self.timeout)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                logger.info("Subscribed to cache invalidations", channel=channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        await handler(self._decode(message["data"]))
+                    except Exception as e:
+                        logger.warning("Bad cache invalidation message", error=str(e))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cache invalidation listener failed, reconnecting", error=str(e))
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+    
+    async def health_check(self) -> bool:
+        return bool(await self._run("ping", self._get_client().ping()))
+    
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Failed to close Redis client", error=str(e))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            **({"codec": self.codec.stats()} if self.codec is not None else {})
+        }
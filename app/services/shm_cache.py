@@ -0,0 +1,243 @@
+"""Cache backend on a memory-mapped hash table shared by every worker on the host.
+
+The table is a file (``/dev/shm`` by default) of fixed-size slots::
+
+    header  magic(8s) slot_count(u32) slot_bytes(u32), padded to 64 bytes
+    slot    seq(u32) value_length(u32) expires_at(f64) key_length(u16) key, padded to 64 bytes, then value
+
+A key lives in one of ``probe`` consecutive slots starting at its hash.
+Writers take an exclusive ``flock`` on the file, so there is a single writer
+at a time across all processes. Readers never lock: each slot carries a
+sequence number that a writer makes odd while it rewrites the slot, and a
+reader decodes straight from the mapping and retries if the number moved.
+"""
+import asyncio
+import mmap
+import os
+import struct
+import time
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+import structlog
+from app.services.cache_backends import CacheBackend
+from app.services.cache_keys import CacheKey, key_bytes, key_from_bytes, stable_hash
+
+try:
+    import fcntl
+except ImportError:  # Optional: not available on Windows
+    fcntl = None
+
+logger = structlog.get_logger()
+
+MAGIC = b"LOCSHM01"
+HEADER = struct.Struct("<8sII")
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<IIdH")
+SEQ = struct.Struct("<I")
+KEY_OFFSET = SLOT_HEADER.size
+VALUE_OFFSET = 64
+MAX_KEY_BYTES = VALUE_OFFSET - KEY_OFFSET
+READ_RETRIES = 4
+SEQ_MASK = 0xFFFFFFFF
+# Slots cleared per lock hold, so clear() never stalls the event loop or other writers for long
+CLEAR_SLICE = 4096
+
+
+class SharedMemoryCacheBackend(CacheBackend):
+    """Host-wide cache shared by every worker through one memory-mapped file.
+    
+    Values are stored codec-encoded; entries larger than a slot are not cached.
+    A full probe window evicts the entry closest to expiry.
+    
+    ``set`` and ``delete`` take the writer lock with a blocking ``flock`` on the
+    event loop; it is only ever held for one slot write (or one ``clear``
+    slice), so the wait is bounded to microseconds.
+    """
+    
+    name = "shm"
+    
+    def __init__(self, path: str, slot_count: int, slot_bytes: int, codec, probe: int = 8):
+        if fcntl is None:
+            raise RuntimeError("The shared-memory cache backend needs fcntl (POSIX)")
+        if codec is None:
+            raise ValueError("The shared-memory cache backend stores encoded entries and needs a codec")
+        self.path = path
+        self.codec = codec
+        self.probe = min(probe, slot_count)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._open(slot_count, slot_bytes)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.rejected = 0
+        self.evictions = 0
+    
+    def _open(self, slot_count: int, slot_bytes: int) -> None:
+        """Map the table, creating it under the writer lock if this is the first process"""
+        if slot_bytes <= VALUE_OFFSET:
+            raise ValueError(f"Slots must be larger than {VALUE_OFFSET} bytes")
+        size = HEADER_SIZE + slot_count * slot_bytes
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, slot_count, slot_bytes), 0)
+            self._map = mmap.mmap(self._fd, 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        
+        magic, self.slot_count, self.slot_bytes = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a shared cache table")
+        if (self.slot_count, self.slot_bytes) != (slot_count, slot_bytes):
+            logger.warning(
+                "Shared cache table geometry differs from settings; using the existing table",
+                path=self.path, slots=self.slot_count, slot_bytes=self.slot_bytes
+            )
+        self._view = memoryview(self._map)
+    
+    def _slots(self, encoded_key: bytes) -> List[int]:
+        start = stable_hash(encoded_key) % self.slot_count
+        return [HEADER_SIZE + ((start + i) % self.slot_count) * self.slot_bytes for i in range(self.probe)]
+    
+    def _read(self, offset: int, encoded_key: bytes) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(key found, live value) for one slot, without locking"""
+        for _ in range(READ_RETRIES):
+            seq, value_length, expires_at, key_length = SLOT_HEADER.unpack_from(self._map, offset)
+            if seq & 1:
+                continue  # Being written right now
+            
+            found = (
+                key_length == len(encoded_key)
+                and self._map[offset + KEY_OFFSET:offset + KEY_OFFSET + key_length] == encoded_key
+            )
+            value = None
+            if found and expires_at > time.time():
+                start = offset + VALUE_OFFSET
+                try:
+                    value = self.codec.decode(self._view[start:start + value_length])
+                except Exception:
+                    value = None  # Torn read; the sequence check below retries it
+            
+            if SEQ.unpack_from(self._map, offset)[0] == seq:
+                return found, value
+        return False, None
+    
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        encoded_key = key_bytes(key)
+        for offset in self._slots(encoded_key):
+            found, value = self._read(offset, encoded_key)
+            if found:
+                if value is None:
+                    break
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+    
+    def _write(self, offset: int, encoded_key: bytes, payload: bytes, expires_at: float) -> None:
+        """Rewrite one slot; caller holds the writer lock"""
+        # The counter wraps; an odd value still marks a write in progress
+        seq = SEQ.unpack_from(self._map, offset)[0]
+        writing = (seq + 1) & SEQ_MASK
+        SEQ.pack_into(self._map, offset, writing)
+        SLOT_HEADER.pack_into(self._map, offset, writing, len(payload), expires_at, len(encoded_key))
+        self._map[offset + KEY_OFFSET:offset + KEY_OFFSET + len(encoded_key)] = encoded_key
+        self._map[offset + VALUE_OFFSET:offset + VALUE_OFFSET + len(payload)] = payload
+        SEQ.pack_into(self._map, offset, (seq + 2) & SEQ_MASK)
+    
+    def _find_slot(self, encoded_key: bytes) -> Tuple[int, bool]:
+        """(slot offset, whether it evicts a live entry) for writing key; caller holds the writer lock"""
+        now = time.time()
+        free = None
+        victim, victim_expiry = None, 0.0
+        for offset in self._slots(encoded_key):
+            _, _, expires_at, key_length = SLOT_HEADER.unpack_from(self._map, offset)
+            if key_length == len(encoded_key) and self._map[offset + KEY_OFFSET:offset + KEY_OFFSET + key_length] == encoded_key:
+                return offset, False
+            if free is None and (key_length == 0 or expires_at <= now):
+                free = offset
+            elif victim is None or expires_at < victim_expiry:
+                victim, victim_expiry = offset, expires_at
+        if free is not None:
+            return free, False
+        return victim, True
+    
+    async def set(self, key: CacheKey, value: Dict[str, Any], ttl: Optional[float]) -> bool:
+        encoded_key = key_bytes(key)
+        payload = self.codec.encode(value)
+        if len(encoded_key) > MAX_KEY_BYTES or VALUE_OFFSET + len(payload) > self.slot_bytes:
+            self.rejected += 1
+            return False
+        expires_at = time.time() + ttl if ttl is not None else float("inf")
+        
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            offset, evicts = self._find_slot(encoded_key)
+            self._write(offset, encoded_key, payload, expires_at)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.writes += 1
+        self.evictions += evicts
+        return True
+    
+    async def delete(self, key: CacheKey) -> bool:
+        encoded_key = key_bytes(key)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            for offset in self._slots(encoded_key):
+                key_length = SLOT_HEADER.unpack_from(self._map, offset)[3]
+                if key_length == len(encoded_key) and self._map[offset + KEY_OFFSET:offset + KEY_OFFSET + key_length] == encoded_key:
+                    self._write(offset, b"", b"", 0.0)
+                    return True
+            return False
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    async def clear(self) -> None:
+        """Empty every slot, a slice at a time; entries written meanwhile by other workers may survive"""
+        for start in range(0, self.slot_count, CLEAR_SLICE):
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                for slot in range(start, min(start + CLEAR_SLICE, self.slot_count)):
+                    offset = HEADER_SIZE + slot * self.slot_bytes
+                    if SLOT_HEADER.unpack_from(self._map, offset)[3]:
+                        self._write(offset, b"", b"", 0.0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            await asyncio.sleep(0)
+    
+    async def scan(self) -> AsyncIterator[Tuple[CacheKey, Dict[str, Any], Optional[float]]]:
+        now = time.time()
+        for slot in range(self.slot_count):
+            offset = HEADER_SIZE + slot * self.slot_bytes
+            _, _, expires_at, key_length = SLOT_HEADER.unpack_from(self._map, offset)
+            if not key_length or expires_at <= now:
+                continue
+            encoded_key = bytes(self._map[offset + KEY_OFFSET:offset + KEY_OFFSET + key_length])
+            found, value = self._read(offset, encoded_key)
+            if found and value is not None:
+                yield key_from_bytes(encoded_key), value, expires_at - now if expires_at != float("inf") else None
+    
+    async def close(self) -> None:
+        # The mapping is shared process-wide state, like the in-memory store; it
+        # stays open across the per-request event loops of the serverless handler
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "slots": self.slot_count,
+            "slotBytes": self.slot_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+            "codec": self.codec.stats()
+        }
@@ -0,0 +1,27 @@
+"""Single-flight coalescing of identical in-flight work"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result.
+    
+    The shared call runs in its own task, so a caller that gets cancelled (e.g. a
+    client disconnect) does not cancel the work the other callers are waiting on.
+    """
+    
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()`` for ``key``, joining an identical call if one is already running"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+    
+    def in_flight(self) -> int:
+        """Number of keys currently being resolved"""
+        return len(self._in_flight)
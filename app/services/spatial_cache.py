@@ -0,0 +1,135 @@
+"""Proximity index over cached locations, so nearby points can share a cache entry"""
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from app.services.cache_keys import CacheKey
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# (language, lat_cell, lng_cell)
+Cell = Tuple[str, int, int]
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Equirectangular distance in meters, accurate at the short ranges the index serves"""
+    x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_M * math.hypot(x, y)
+
+
+class ProximityGrid:
+    """Lat/lng grid whose cells are at least ``radius_m`` wide, so every point
+    within the radius of a query lies in the query cell or one of its 8 neighbors.
+    
+    Cell width in longitude varies by latitude row (cells widen toward the poles).
+    """
+    
+    def __init__(self, radius_m: float):
+        self.radius_m = radius_m
+        self.lat_step = radius_m / METERS_PER_DEGREE
+        self._cells: Dict[Cell, Dict[CacheKey, Tuple[float, float, float]]] = {}
+    
+    def _lng_step(self, row: int) -> float:
+        # Narrowest point of the row (its pole-ward edge) must still span the radius
+        edge = max(abs(row * self.lat_step), abs((row + 1) * self.lat_step))
+        cos_lat = math.cos(math.radians(min(edge, 89.0)))
+        return min(360.0, self.lat_step / cos_lat)
+    
+    def cell(self, lat: float, lng: float, language: str) -> Cell:
+        row = math.floor(lat / self.lat_step)
+        return language, row, math.floor(lng / self._lng_step(row))
+    
+    def add(self, cell: Cell, key: CacheKey, lat: float, lng: float, expires_at: float) -> None:
+        self._cells.setdefault(cell, {})[key] = (lat, lng, expires_at)
+    
+    def remove(self, cell: Cell, key: CacheKey) -> None:
+        entries = self._cells.get(cell)
+        if entries is not None:
+            entries.pop(key, None)
+            if not entries:
+                del self._cells[cell]
+    
+    def nearest(self, lat: float, lng: float, language: str, now: float) -> Optional[Tuple[CacheKey, float]]:
+        """Closest live (key, distance) within the radius, or None"""
+        best: Optional[Tuple[CacheKey, float]] = None
+        row = math.floor(lat / self.lat_step)
+        for r in (row - 1, row, row + 1):
+            column = math.floor(lng / self._lng_step(r))
+            for c in (column - 1, column, column + 1):
+                for key, (entry_lat, entry_lng, expires_at) in self._cells.get((language, r, c), {}).items():
+                    if expires_at <= now:
+                        continue
+                    distance = distance_m(lat, lng, entry_lat, entry_lng)
+                    if distance <= self.radius_m and (best is None or distance < best[1]):
+                        best = (key, distance)
+        return best
+    
+    def clear(self) -> None:
+        self._cells.clear()
+
+
+class ProximityIndex:
+    """Cached keys indexed by position, one grid per place-type radius.
+    
+    Bounded to ``max_entries`` (oldest first out); entries also carry the
+    cache TTL so expired ones are never returned. The index only points at
+    cache keys: a hit must still be read from the cache backend, and a key the
+    backend no longer holds should be dropped with ``remove()``.
+    """
+    
+    def __init__(self, radii_m: Dict[str, float], max_entries: int):
+        self.radii_m = {place_type: radius for place_type, radius in radii_m.items() if radius > 0}
+        self.max_entries = max_entries
+        self._grids: Dict[float, ProximityGrid] = {
+            radius: ProximityGrid(radius) for radius in set(self.radii_m.values())
+        }
+        # key -> (grid, cell)
+        self._entries: "OrderedDict[CacheKey, Tuple[ProximityGrid, Cell]]" = OrderedDict()
+        self.hits = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def add(self, key: CacheKey, lat: float, lng: float, language: str, place_type: Optional[str], ttl: float) -> None:
+        """Index a cached entry; place types without a configured radius are not indexed"""
+        radius = self.radii_m.get(place_type)
+        if radius is None:
+            return
+        self.remove(key)
+        grid = self._grids[radius]
+        cell = grid.cell(lat, lng, language)
+        grid.add(cell, key, lat, lng, time.monotonic() + ttl)
+        self._entries[key] = (grid, cell)
+        while len(self._entries) > self.max_entries:
+            oldest, (oldest_grid, oldest_cell) = self._entries.popitem(last=False)
+            oldest_grid.remove(oldest_cell, oldest)
+    
+    def remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            grid, cell = entry
+            grid.remove(cell, key)
+    
+    def nearest(self, lat: float, lng: float, language: str) -> Optional[Tuple[CacheKey, float]]:
+        """Closest indexed key within its place type's radius, as (key, distance in meters)"""
+        now = time.monotonic()
+        best: Optional[Tuple[CacheKey, float]] = None
+        for grid in self._grids.values():
+            match = grid.nearest(lat, lng, language, now)
+            if match is not None and (best is None or match[1] < best[1]):
+                best = match
+        return best
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        for grid in self._grids.values():
+            grid.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "radiiMeters": self.radii_m
+        }
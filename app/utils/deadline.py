@@ -0,0 +1,22 @@
+"""Per-request time budgets"""
+import time
+
+
+class Deadline:
+    """Absolute deadline on the monotonic clock, shared by everything serving one request"""
+    
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+    
+    @classmethod
+    def from_ms(cls, budget_ms: int) -> "Deadline":
+        return cls(budget_ms / 1000)
+    
+    def remaining(self) -> float:
+        """Seconds left in the budget, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
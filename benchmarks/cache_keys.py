@@ -0,0 +1,52 @@
+"""Compare the integer-packed cache keys against the old f-string keys.
+
+Run from the repository root:
+
+    python benchmarks/cache_keys.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache_keys import pack_key, key_bytes
+
+PRECISION = 4
+POINTS = 10000
+
+
+def legacy_cache_key(lat: float, lng: float, language: str = "en") -> str:
+    """The previous CacheService.generate_cache_key"""
+    rounded_lat = round(lat * (10 ** PRECISION)) / (10 ** PRECISION)
+    rounded_lng = round(lng * (10 ** PRECISION)) / (10 ** PRECISION)
+    return f"location:{rounded_lat}:{rounded_lng}:{language}"
+
+
+def packed_cache_key(lat: float, lng: float, language: str = "en") -> int:
+    return pack_key(lat, lng, language, PRECISION)
+
+
+def bench(name, fn, points, table):
+    build = min(timeit.repeat(lambda: [fn(lat, lng) for lat, lng in points], number=5, repeat=5))
+    lookup = min(timeit.repeat(lambda: [table.get(fn(lat, lng)) for lat, lng in points], number=5, repeat=5))
+    per_call = 1e9 / (5 * len(points))
+    key_size = sum(sys.getsizeof(key) for key in table) / len(table)
+    print(f"{name:<8} build {build * per_call:7.1f} ns/key   build+lookup {lookup * per_call:7.1f} ns/key   {key_size:5.1f} bytes/key")
+
+
+def main():
+    random.seed(42)
+    points = [(random.uniform(-60, 70), random.uniform(-180, 180)) for _ in range(POINTS)]
+    legacy_table = {legacy_cache_key(lat, lng): None for lat, lng in points}
+    packed_table = {packed_cache_key(lat, lng): None for lat, lng in points}
+    assert len(legacy_table) == len(packed_table)
+    
+    bench("f-string", legacy_cache_key, points, legacy_table)
+    bench("packed", packed_cache_key, points, packed_table)
+    print(f"redis key: {len(legacy_cache_key(*points[0]))} bytes (f-string) vs {len(key_bytes(packed_cache_key(*points[0])))} bytes (packed)")
+
+
+if __name__ == "__main__":
+    main()
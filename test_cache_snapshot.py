@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped cache snapshot format and packed cache keys
+"""
+import random
+from app.services import cache_snapshot
+from app.services.cache_keys import KIND_LOCATION, KIND_LOCALITY, pack_key, unpack_key, key_bytes, key_from_bytes
+from app.services.cache_snapshot import CacheSnapshot, write_snapshot, load_snapshot
+
+
+def sample_items(count: int = 500) -> list:
+    """(key, value, ttl) items with packed keys of both kinds and a few string keys"""
+    rng = random.Random(17)
+    items = {}
+    for i in range(count):
+        lat, lng = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        kind = KIND_LOCALITY if i % 3 == 0 else KIND_LOCATION
+        key = pack_key(lat, lng, rng.choice(["en", "fr", "zh"]), 4 if kind == KIND_LOCATION else 2, kind)
+        items[key] = ({"success": True, "data": {"index": i, "name": f"place {i}"}}, None if i % 5 == 0 else 3600.0)
+    # Keys that don't fit the packed layout stay strings
+    for key in (pack_key(1.5, 2.5, "en-GB", 4), pack_key(1.5, 2.5, "en", 6)):
+        assert isinstance(key, str)
+        items[key] = ({"success": False, "error": {"code": "NO_RESULT"}}, 60.0)
+    return [(key, value, ttl) for key, (value, ttl) in items.items()]
+
+
+def test_packed_keys_round_trip():
+    rng = random.Random(17)
+    for _ in range(2000):
+        lat, lng = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        precision = rng.choice([2, 4, 5])
+        kind = rng.choice([KIND_LOCATION, KIND_LOCALITY])
+        key = pack_key(lat, lng, "pt", precision, kind)
+        assert isinstance(key, int) and key < 2 ** 64
+        assert unpack_key(key, precision) == (kind, round(lat, precision), round(lng, precision), "pt")
+        assert key_from_bytes(key_bytes(key)) == key
+    assert key_from_bytes(key_bytes("location:1.5:2.5:en-GB")) == "location:1.5:2.5:en-GB"
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "cache.snap")
+    items = sample_items()
+    assert write_snapshot(path, items) == len(items)
+    
+    snapshot = load_snapshot(path)
+    assert len(snapshot) == len(items)
+    for key, value, ttl in items:
+        found, remaining = snapshot.get(key)
+        assert found == value
+        if ttl is None:
+            assert remaining is None
+        else:
+            assert 0 < remaining <= ttl
+    
+    assert snapshot.get(pack_key(0.0, 0.0, "de", 4)) is None
+    assert snapshot.get("location:0.0:0.0:xx-YY") is None
+    assert snapshot.stats()["hits"] == len(items)
+    snapshot.close()
+
+
+def test_snapshot_skips_expired_entries(tmp_path):
+    path = str(tmp_path / "cache.snap")
+    key = pack_key(10.0, 20.0, "en", 4)
+    write_snapshot(path, [(key, {"success": True}, -1.0)])
+    snapshot = CacheSnapshot(path)
+    assert snapshot.get(key) is None
+    snapshot.close()
+
+
+def test_snapshot_hash_collisions(tmp_path, monkeypatch):
+    """Keys sharing an index hash are told apart by their stored bytes"""
+    monkeypatch.setattr(cache_snapshot, "stable_hash", lambda encoded_key: 7)
+    path = str(tmp_path / "cache.snap")
+    items = sample_items(50)
+    write_snapshot(path, items)
+    snapshot = CacheSnapshot(path)
+    for key, value, _ in items:
+        assert snapshot.get(key)[0] == value
+    assert snapshot.get(pack_key(0.0, 0.0, "de", 4)) is None
+    snapshot.close()
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot"
+    path.write_bytes(b"x" * 64)
+    assert load_snapshot(str(path)) is None
+    assert load_snapshot(str(tmp_path / "missing")) is None
+    assert load_snapshot(None) is None
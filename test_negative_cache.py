@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for negative caching of failed lookups
+"""
+import asyncio
+from datetime import datetime
+from app.config import settings
+from app.models.response import LocationResponse
+from app.services.cache import CacheService
+from app.services.geocoding import GeocodingService
+from app.services.spatial_cache import ProximityIndex
+from app.utils.deadline import Deadline
+
+LAT, LNG = -33.8688, 151.2093
+NEIGHBOUR = (LAT + 0.0005, LNG)  # ~55 m away, a different cache cell within the locality radius
+
+
+def located(lat: float, lng: float) -> dict:
+    """A successful locality-level response"""
+    return LocationResponse(success=True, data={
+        "address": {
+            "fullAddress": "Sydney NSW, Australia",
+            "formattedAddress": "Sydney NSW, Australia",
+            "shortAddress": "Sydney",
+            "components": {"city": "Sydney", "countryCode": "AU"},
+            "coordinates": {"latitude": lat, "longitude": lng, "accuracy": "medium"},
+            "placeType": "locality",
+            "confidence": 0.8
+        },
+        "metadata": {"source": "google_maps", "processingTime": "0.1s", "cached": False, "lastUpdated": datetime.utcnow()}
+    }).dict()
+
+
+def failed(code: str) -> dict:
+    return LocationResponse(success=False, error={"code": code, "message": code}).dict()
+
+
+def proximity_cache() -> CacheService:
+    cache = CacheService()
+    cache.proximity = ProximityIndex(settings.CACHE_PROXIMITY_RADII_M, 1000)
+    return cache
+
+
+def test_failure_is_not_served_to_neighbours():
+    """A failure written over a successful entry takes it out of the proximity index"""
+    async def run():
+        cache = proximity_cache()
+        await cache.set_location(LAT, LNG, "en", located(LAT, LNG))
+        assert (await cache.get_location(*NEIGHBOUR, "en"))["success"]
+        
+        await cache.set_location(LAT, LNG, "en", failed("GEOCODING_FAILED"))
+        assert await cache.get_location(*NEIGHBOUR, "en") is None
+        assert len(cache.proximity) == 0
+        
+        # The same through the batched write
+        await cache.set_many([(LAT, LNG, "en", located(LAT, LNG))])
+        assert (await cache.get_location(*NEIGHBOUR, "en"))["success"]
+        await cache.set_many([(LAT, LNG, "en", failed("GEOCODING_FAILED"))])
+        assert await cache.get_location(*NEIGHBOUR, "en") is None
+        await cache.delete_location(LAT, LNG, "en")
+    
+    asyncio.run(run())
+
+
+def test_nearby_lookup_skips_negative_entries():
+    """An indexed key whose backend entry became a failure is dropped, not served"""
+    async def run():
+        cache = proximity_cache()
+        await cache.set_location(LAT, LNG, "en", located(LAT, LNG))
+        cache_key = cache.generate_cache_key(LAT, LNG, "en")
+        entry = await cache.backend.get(cache_key)
+        await cache.backend.set(cache_key, {**entry, **failed("GEOCODING_FAILED")}, 60)
+        
+        assert await cache.get_location(*NEIGHBOUR, "en") is None
+        assert len(cache.proximity) == 0
+        await cache.delete_location(LAT, LNG, "en")
+    
+    asyncio.run(run())
+
+
+def classify(outcomes: list, deadline: Deadline = None) -> str:
+    """Error code reverse_geocode reports when the provider calls end with these outcomes"""
+    service = GeocodingService()
+    service._provider_chain = lambda country: [f"provider-{i}" for i in range(len(outcomes))]
+    remaining = list(outcomes)
+    
+    async def fake_call_provider(provider, lat, lng, language, country, deadline, outcomes, wait_for_limits):
+        outcomes.append(remaining.pop(0))
+        return None
+    
+    service._call_provider = fake_call_provider
+    hedging = settings.HEDGING_ENABLED
+    settings.HEDGING_ENABLED = False
+    try:
+        response = asyncio.run(service.reverse_geocode(LAT, LNG, "en", deadline))
+    finally:
+        settings.HEDGING_ENABLED = hedging
+    assert not response.success
+    return response.error["code"]
+
+
+def test_failure_classification():
+    """Only a unanimous "no address here" is NO_RESULT; partial or failed coverage is not"""
+    assert classify(["no_result", "no_result"]) == "NO_RESULT"
+    assert classify(["no_result", "error"]) == "GEOCODING_FAILED"
+    assert classify(["no_result", "skipped"]) == "GEOCODING_FAILED"
+    assert classify(["error", "error"]) == "GEOCODING_FAILED"
+    assert classify(["skipped", "skipped"]) == "PROVIDERS_UNAVAILABLE"
+    assert classify(["no_result"], Deadline.from_ms(0)) == "DEADLINE_EXCEEDED"
+
+
+def test_negative_ttls():
+    cache = CacheService()
+    assert cache.get_negative_ttl("NO_RESULT") == settings.CACHE_NO_RESULT_TTL_SECONDS
+    assert cache.get_negative_ttl("GEOCODING_FAILED") == settings.CACHE_NEGATIVE_TTL_SECONDS
+    assert cache.get_negative_ttl("GEOCODING_ERROR") == settings.CACHE_NEGATIVE_TTL_SECONDS
+    assert cache.get_negative_ttl(None) == settings.CACHE_NEGATIVE_TTL_SECONDS
+    assert cache.get_negative_ttl("DEADLINE_EXCEEDED") == 0
+    assert cache.get_negative_ttl("PROVIDERS_UNAVAILABLE") == 0
+    assert settings.CACHE_NO_RESULT_TTL_SECONDS > settings.CACHE_NEGATIVE_TTL_SECONDS
+
+
+def test_failures_are_cached_with_their_ttl():
+    """Failures are written with the TTL of their code, and never when it is 0"""
+    async def run():
+        cache = CacheService()
+        for i, code in enumerate(["NO_RESULT", "GEOCODING_FAILED", "DEADLINE_EXCEEDED", "PROVIDERS_UNAVAILABLE"]):
+            lat = LAT + 0.01 * (i + 1)
+            ttl = cache.get_negative_ttl(code)
+            assert await cache.set_location(lat, LNG, "en", failed(code)) == (ttl > 0)
+            cached = await cache.get_location(lat, LNG, "en")
+            if ttl > 0:
+                assert cached["error"]["code"] == code
+                assert cached["cache_ttl"] == ttl
+                await cache.delete_location(lat, LNG, "en")
+            else:
+                assert cached is None
+    
+    asyncio.run(run())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline geocoding indexes, checked against brute force
+"""
+import math
+import random
+import pytest
+from app.services.admin_boundaries import STRtree, AdminBoundaryIndex, point_in_polygon
+from app.services.address_points import KDTree, AddressPointIndex
+
+
+def star_polygon(rng: random.Random, cx: float, cy: float, radius: float, vertices: int = 12) -> list:
+    """A simple (star-shaped) closed ring around (cx, cy)"""
+    ring = []
+    for k in range(vertices):
+        angle = 2 * math.pi * k / vertices
+        r = radius * rng.uniform(0.5, 1.0)
+        ring.append((cx + r * math.cos(angle), cy + r * math.sin(angle)))
+    return ring + ring[:1]
+
+
+def test_point_in_polygon_with_hole():
+    outer = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+    hole = [(4, 4), (6, 4), (6, 6), (4, 6), (4, 4)]
+    assert point_in_polygon(2, 2, [outer, hole])
+    assert not point_in_polygon(5, 5, [outer, hole])
+    assert not point_in_polygon(11, 5, [outer, hole])
+
+
+def test_rtree_query_matches_brute_force():
+    rng = random.Random(8)
+    boxes = []
+    for i in range(2000):
+        x, y = rng.uniform(-180, 170), rng.uniform(-90, 80)
+        boxes.append(((x, y, x + rng.uniform(0, 10), y + rng.uniform(0, 10)), i))
+    tree = STRtree(boxes)
+    
+    for _ in range(500):
+        x, y = rng.uniform(-180, 180), rng.uniform(-90, 90)
+        expected = {i for (minx, miny, maxx, maxy), i in boxes if minx <= x <= maxx and miny <= y <= maxy}
+        assert set(tree.query_point(x, y)) == expected
+
+
+def test_admin_lookup_matches_brute_force():
+    """The smallest containing boundary of each level wins, holes excluded"""
+    rng = random.Random(8)
+    features, boundaries = [], []
+    for i in range(400):
+        level = "state" if i % 4 == 0 else "city"
+        cx, cy = rng.uniform(0, 20), rng.uniform(0, 20)
+        radius = rng.uniform(1.0, 6.0) if level == "state" else rng.uniform(0.2, 2.0)
+        rings = [star_polygon(rng, cx, cy, radius)]
+        if i % 5 == 0:
+            h = radius * 0.2
+            rings.append([(cx - h, cy - h), (cx + h, cy - h), (cx + h, cy + h), (cx - h, cy + h), (cx - h, cy - h)])
+        name = f"{level}-{i}"
+        features.append({
+            "type": "Feature",
+            "properties": {"level": level, "name": name},
+            "geometry": {"type": "Polygon", "coordinates": [[list(point) for point in ring] for ring in rings]}
+        })
+        boundaries.append((level, name, rings, AdminBoundaryIndex._bbox_area(rings[0])))
+    index = AdminBoundaryIndex(features)
+    
+    answered = 0
+    for _ in range(2000):
+        lng, lat = rng.uniform(-1, 21), rng.uniform(-1, 21)
+        expected = {}
+        for level, name, rings, area in boundaries:
+            if point_in_polygon(lng, lat, rings) and (level not in expected or area < expected[level][1]):
+                expected[level] = (name, area)
+        
+        result = index.lookup(lat, lng)
+        if not expected:
+            assert result is None
+            continue
+        answered += 1
+        components = result["components"]
+        assert {level: components.get(level) for level in ("state", "city") if level in components} == {
+            level: name for level, (name, _) in expected.items()
+        }
+    assert answered > 1000
+
+
+def test_kdtree_nearest_matches_brute_force():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(9)
+    # Clustered points with exact duplicates, so leaves and ties are exercised
+    centers = rng.uniform(-1, 1, size=(20, 3))
+    points = np.concatenate([centers[rng.integers(0, 20, 3000)] + rng.normal(0, 0.05, size=(3000, 3)), centers])
+    tree = KDTree(points, leaf_size=16)
+    
+    for query in rng.uniform(-1.2, 1.2, size=(500, 3)):
+        distances = np.sqrt(((points - query) ** 2).sum(axis=1))
+        index, distance = tree.nearest(query)
+        assert math.isclose(distance, distances.min())
+        assert math.isclose(distances[index], distances.min())
+        
+        # Nothing within a radius below the nearest distance
+        assert tree.nearest(query, distances.min() * 0.99) is None
+    
+    assert KDTree(np.empty((0, 3))).nearest(np.zeros(3)) is None
+
+
+def test_address_lookup_matches_haversine():
+    pytest.importorskip("numpy")
+    rng = random.Random(9)
+    coordinates = [(rng.uniform(-33.95, -33.80), rng.uniform(151.10, 151.30)) for _ in range(2000)]
+    attributes = [(str(i), "Test Street", None, "Sydney", None, "NSW", "2000") for i in range(len(coordinates))]
+    index = AddressPointIndex(coordinates, attributes)
+    
+    def haversine(a, b):
+        lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+        h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        return 2 * 6371008.8 * math.asin(math.sqrt(h))
+    
+    for _ in range(300):
+        query = (rng.uniform(-33.96, -33.79), rng.uniform(151.09, 151.31))
+        distances = [haversine(query, point) for point in coordinates]
+        nearest = min(range(len(coordinates)), key=distances.__getitem__)
+        
+        result = index.lookup(*query, max_distance_m=5000)
+        assert result["components"]["houseNumber"] == str(nearest)
+        assert abs(result["distanceMeters"] - distances[nearest]) < 0.2
+        assert index.lookup(*query, max_distance_m=distances[nearest] * 0.99) is None
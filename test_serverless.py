@@ -37,6 +37,434 @@ def test_cache_service():
     
     asyncio.run(test_cache())
 
+def test_cache_eviction():
+    """Test that the in-memory store stays within its bounds"""
+    from app.services.cache_store import MemoryCacheStore
+    
+    for policy in ["lru", "tinylfu"]:
+        store = MemoryCacheStore(max_entries=50, max_bytes=10**9, policy=policy)
+        for i in range(500):
+            store.set(f"key:{i}", {"value": i})
+        assert len(store) <= 50
+        assert store.stats()["evictions"] > 0
+    
+    store = MemoryCacheStore(max_entries=1000, max_bytes=2000, policy="lru")
+    for i in range(100):
+        store.set(f"key:{i}", {"value": "x" * 100})
+    assert store.total_bytes <= 2000
+    
+    print("✅ Cache eviction working correctly")
+
+def test_cache_batch_lookup():
+    """Test that a batch lookup reads the backend once, plus once for every fallback"""
+    import asyncio
+    from datetime import datetime
+    from app.config import settings
+    from app.models.request import DetailLevel
+    from app.models.response import LocationResponse
+    from app.services.spatial_cache import ProximityIndex
+    
+    async def test_lookup():
+        cache = CacheService()
+        cache.proximity = ProximityIndex(settings.CACHE_PROXIMITY_RADII_M, 1000)
+        located = LocationResponse(success=True, data={
+            "address": {
+                "fullAddress": "Sydney NSW, Australia",
+                "formattedAddress": "Sydney NSW, Australia",
+                "shortAddress": "Sydney",
+                "components": {"city": "Sydney", "state": "NSW", "country": "Australia", "countryCode": "AU"},
+                "coordinates": {"latitude": -33.8688, "longitude": 151.2093, "accuracy": "medium"},
+                "placeType": "locality",
+                "confidence": 0.8
+            },
+            "metadata": {"source": "google_maps", "processingTime": "0.1s", "cached": False, "lastUpdated": datetime.utcnow()}
+        })
+        await cache.set_location(-33.8688, 151.2093, "en", located.dict())
+        
+        reads, single_reads = [], []
+        get, get_many = cache.backend.get, cache.backend.get_many
+        
+        async def counted_get_many(keys):
+            reads.append(keys)
+            return {key: value for key in keys if (value := await get(key)) is not None}
+        
+        async def counted_get(key):
+            single_reads.append(key)
+            return await get(key)
+        
+        cache.backend.get_many, cache.backend.get = counted_get_many, counted_get
+        try:
+            # Exact hit, two proximity hits, and a point answered by the locality cell
+            points = [(-33.8688, 151.2093), (-33.8692, 151.2093), (-33.8684, 151.2093), (-33.8740, 151.2093)]
+            results = await cache.get_many(points, "en", DetailLevel.LOCALITY)
+        finally:
+            del cache.backend.get_many, cache.backend.get
+        
+        assert (len(reads), single_reads) == (2, [])
+        assert all(result and result["success"] for result in results)
+        await cache.delete_location(-33.8688, 151.2093, "en")
+    
+    asyncio.run(test_lookup())
+    print("✅ Cache batch lookup working correctly")
+
+def test_cache_expiry():
+    """Test that expired entries are reclaimed and rewrites don't grow the expiry heap"""
+    import time
+    from app.services.cache_store import MemoryCacheStore
+    
+    store = MemoryCacheStore(max_entries=1000, max_bytes=10**9, policy="lru")
+    for _ in range(100):
+        store.set("hot", {"value": 1}, 60)
+    assert len(store._expiry_heap) == 1
+    
+    store.set("shortened", {"value": 1}, 60)
+    store.set("shortened", {"value": 1}, 0.05)
+    store.set("extended", {"value": 1}, 0.05)
+    store.set("extended", {"value": 1}, 0.3)
+    time.sleep(0.1)
+    assert store.expire(10) == 1
+    assert "shortened" not in store and "extended" in store
+    
+    time.sleep(0.25)
+    assert store.expire(10) == 1
+    assert "extended" not in store and "hot" in store
+    
+    print("✅ Cache expiry working correctly")
+
+def test_circuit_breaker():
+    """Test that the breaker opens on failures and late outcomes don't extend its cooldown"""
+    import time
+    from app.services.circuit_breaker import CircuitBreaker, CircuitState
+    
+    breaker = CircuitBreaker("test", window_size=10, min_calls=4, open_cooldown=0.2, half_open_max_calls=1)
+    for _ in range(4):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    
+    # Outcomes of calls still in flight when it opened are ignored
+    opened_at = breaker._opened_at
+    time.sleep(0.05)
+    breaker.record_failure()
+    breaker.record_success(0.01)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker._opened_at == opened_at
+    
+    # After the cooldown one probe goes through; its success closes the breaker
+    time.sleep(0.2)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success(0.01)
+    assert breaker.state == CircuitState.CLOSED
+    
+    print("✅ Circuit breaker working correctly")
+
+def test_single_flight():
+    """Test that concurrent calls for one key share a single execution"""
+    import asyncio
+    from app.services.singleflight import SingleFlight
+    
+    async def test_flight():
+        flight = SingleFlight()
+        calls = []
+        
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.05)
+            return key.upper()
+        
+        results = await asyncio.gather(*(flight.do(key, lambda key=key: work(key)) for key in ["a", "a", "a", "b"]))
+        assert results == ["A", "A", "A", "B"]
+        assert sorted(calls) == ["a", "b"]
+        assert flight.in_flight() == 0
+        
+        # A cancelled caller does not cancel the shared call
+        waiter = asyncio.ensure_future(flight.do("c", lambda: work("c")))
+        other = asyncio.ensure_future(flight.do("c", lambda: work("c")))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        assert await other == "C"
+    
+    asyncio.run(test_flight())
+    print("✅ Single flight working correctly")
+
+def test_token_bucket():
+    """Test that the token bucket paces callers and turns away long waits"""
+    import asyncio
+    import time
+    from app.services.rate_limiter import TokenBucket
+    
+    async def test_bucket():
+        bucket = TokenBucket(rate=20.0, capacity=2, max_waiters=10, max_wait=0.5)
+        assert await bucket.acquire()
+        assert await bucket.acquire()
+        
+        # The third caller waits for the next token (1/20 s)
+        started = time.monotonic()
+        assert await bucket.acquire()
+        assert time.monotonic() - started >= 0.04
+        
+        # A wait longer than the caller's timeout is refused without waiting
+        assert not await bucket.acquire(timeout=0.0)
+        assert bucket.snapshot()["rejected"] == 1
+        
+        # Patient callers queued up don't push interactive callers past max_wait
+        bucket = TokenBucket(rate=20.0, capacity=1, max_waiters=10, max_wait=0.1)
+        assert await bucket.acquire()
+        patient = [asyncio.ensure_future(bucket.acquire(patient=True)) for _ in range(10)]
+        await asyncio.sleep(0)
+        assert await bucket.acquire()
+        assert all(await asyncio.gather(*patient))
+    
+    asyncio.run(test_bucket())
+    print("✅ Token bucket working correctly")
+
+def test_shared_memory_cache():
+    """Test the shared-memory backend: seqlock, probe-window eviction, delete and reopening"""
+    import asyncio
+    import tempfile
+    from app.services import shm_cache
+    from app.services.shm_cache import SharedMemoryCacheBackend, SEQ
+    from app.services.cache_codec import CacheCodec
+    from app.services.cache_keys import key_bytes
+    
+    if shm_cache.fcntl is None:
+        print("⏭️  Shared-memory cache needs fcntl, skipped")
+        return
+    
+    def slot_of(backend, key):
+        encoded_key = key_bytes(key)
+        for offset in backend._slots(encoded_key):
+            if backend._read(offset, encoded_key)[0]:
+                return offset
+    
+    async def test_shm(path):
+        # Two slots, both in every key's probe window
+        backend = SharedMemoryCacheBackend(path, slot_count=2, slot_bytes=256, codec=CacheCodec(), probe=2)
+        assert await backend.set("a", {"v": "a"}, 100)
+        assert (await backend.get("a")) == {"v": "a"}
+        
+        # A slot whose sequence number is odd is mid-write: readers retry, then give up
+        offset = slot_of(backend, "a")
+        seq = SEQ.unpack_from(backend._map, offset)[0]
+        SEQ.pack_into(backend._map, offset, seq + 1)
+        assert (await backend.get("a")) is None
+        SEQ.pack_into(backend._map, offset, seq)
+        assert (await backend.get("a")) == {"v": "a"}
+        
+        # The sequence number wraps instead of overflowing the u32
+        SEQ.pack_into(backend._map, offset, 0xFFFFFFFE)
+        assert await backend.set("a", {"v": "a2"}, 100)
+        assert SEQ.unpack_from(backend._map, offset)[0] == 0
+        assert (await backend.get("a")) == {"v": "a2"}
+        
+        # A full probe window evicts the entry closest to expiry
+        assert await backend.set("b", {"v": "b"}, 10)
+        assert await backend.set("c", {"v": "c"}, 50)
+        assert backend.evictions == 1
+        assert (await backend.get("b")) is None
+        assert (await backend.get("a")) == {"v": "a2"}
+        assert (await backend.get("c")) == {"v": "c"}
+        
+        # Oversized values are refused rather than truncated
+        assert not await backend.set("big", {"v": "x" * 500}, 10)
+        
+        assert await backend.delete("c")
+        assert not await backend.delete("c")
+        assert (await backend.get("c")) is None
+        
+        # Reopening with other geometry keeps the existing table and its entries
+        reopened = SharedMemoryCacheBackend(path, slot_count=64, slot_bytes=512, codec=CacheCodec(), probe=8)
+        assert (reopened.slot_count, reopened.slot_bytes) == (2, 256)
+        assert (await reopened.get("a")) == {"v": "a2"}
+        
+        await reopened.clear()
+        assert (await backend.get("a")) is None
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(test_shm(f"{tmp}/cache"))
+    print("✅ Shared-memory cache working correctly")
+
+def test_batch_shared_cells():
+    """Test that batch points sharing a cache cell are geocoded once but keep their own coordinates"""
+    from fastapi.testclient import TestClient
+    from app.api.v1 import location
+    from app.models.response import LocationResponse
+    
+    calls = []
+    
+    async def fake_reverse_geocode(lat, lng, language="en", deadline=None, detail=None, wait_for_limits=False):
+        calls.append((lat, lng))
+        return LocationResponse(
+            success=False,
+            error={"code": "PROVIDERS_UNAVAILABLE", "message": "No provider available"},
+            coordinates={"latitude": lat, "longitude": lng}
+        )
+    
+    original = location.geocoding_service.reverse_geocode
+    location.geocoding_service.reverse_geocode = fake_reverse_geocode
+    try:
+        with TestClient(app) as client:
+            points = [{"latitude": -37.81361, "longitude": 144.96301}, {"latitude": -37.81359, "longitude": 144.96299}]
+            response = client.post("/api/v1/location/reverse/batch", json={"locations": points})
+    finally:
+        location.geocoding_service.reverse_geocode = original
+    
+    assert response.status_code == 200
+    assert len(calls) == 1
+    assert [result["coordinates"] for result in response.json()["results"]] == points
+    print("✅ Batch shared cells working correctly")
+
+def test_batch_jobs():
+    """Test the batch job API: uploads, progress, streamed results, retries and resuming"""
+    import asyncio
+    import json
+    import tempfile
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.api.v1 import location
+    from app.models.request import DetailLevel
+    from app.models.response import LocationResponse
+    from app.services.batch_jobs import BatchJobManager, JobStore
+    from app.services.cache import CacheService
+    
+    calls = []
+    
+    async def fake_reverse_geocode(lat, lng, language="en", deadline=None, detail=None, wait_for_limits=False):
+        calls.append((lat, lng))
+        # The first attempt at latitude -33 finds every provider throttled
+        code = "PROVIDERS_UNAVAILABLE" if lat == -33 and calls.count((lat, lng)) == 1 else "NO_RESULT"
+        return LocationResponse(success=False, error={"code": code, "message": code})
+    
+    def wait_for(client, job_id):
+        for _ in range(200):
+            job = client.get(f"/api/v1/location/jobs/{job_id}").json()
+            if job["status"] not in ("queued", "running"):
+                return job
+            asyncio.run(asyncio.sleep(0.02))
+        raise AssertionError("job did not finish")
+    
+    original = (location.geocoding_service.reverse_geocode, settings.JOBS_DB_PATH, settings.JOB_RETRY_BACKOFF_SECONDS)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.JOBS_DB_PATH = f"{tmp}/jobs.db"
+        settings.JOB_RETRY_BACKOFF_SECONDS = 0.05
+        location.geocoding_service.reverse_geocode = fake_reverse_geocode
+        try:
+            with TestClient(app) as client:
+                # NDJSON, with a blank line and no trailing newline
+                body = '{"latitude": -31, "longitude": 150}\n\n{"latitude": -32, "longitude": 150}\n{"latitude": -33, "longitude": 150}'
+                response = client.post("/api/v1/location/jobs", content=body, headers={"content-type": "application/x-ndjson"})
+                assert response.status_code == 202
+                submitted = response.json()
+                assert submitted["total"] == 3
+                
+                # Following the stream returns every result once, in input order
+                lines = client.get(f"/api/v1/location/jobs/{submitted['jobId']}/results").text.splitlines()
+                results = [json.loads(line) for line in lines]
+                assert [result["index"] for result in results] == [0, 1, 2]
+                assert results[2]["coordinates"] == {"latitude": -33.0, "longitude": 150.0}
+                
+                # The throttled point was retried, not saved as a failure of the point
+                assert results[2]["error"]["code"] == "NO_RESULT"
+                assert calls.count((-33.0, 150.0)) == 2
+                
+                job = wait_for(client, submitted["jobId"])
+                assert (job["status"], job["completed"], job["progress"]) == ("completed", 3, 1.0)
+                
+                # Resuming the stream after an index
+                lines = client.get(
+                    f"/api/v1/location/jobs/{submitted['jobId']}/results",
+                    params={"after": 1, "follow": False}
+                ).text.splitlines()
+                assert [json.loads(line)["index"] for line in lines] == [2]
+                
+                # Columnar upload
+                response = client.post("/api/v1/location/jobs", json={"latitude": [-34, -35], "longitude": [150, 150]})
+                assert response.status_code == 202
+                assert wait_for(client, response.json()["jobId"])["completed"] == 2
+                
+                # Bad uploads are rejected with the offending line
+                response = client.post("/api/v1/location/jobs", content='{"latitude": 95, "longitude": 0}', headers={"content-type": "application/x-ndjson"})
+                assert response.status_code == 400
+                assert client.get("/api/v1/location/jobs/missing").status_code == 404
+                
+                # A full queue turns submissions away
+                accepting = location.job_manager.accepting
+                location.job_manager.accepting = lambda: False
+                try:
+                    response = client.post("/api/v1/location/jobs", json={"latitude": [-36], "longitude": [150]})
+                    assert response.status_code == 503
+                    assert "retry-after" in response.headers
+                finally:
+                    location.job_manager.accepting = accepting
+            
+            # A job interrupted after its first point, its lease expired
+            store = JobStore(settings.JOBS_DB_PATH)
+            store.create_job("resumed", "en", DetailLevel.STREET.value, "crashed", 0.0)
+            store.add_points("resumed", 0, [(-40.0, 150.0), (-41.0, 150.0), (-42.0, 150.0)])
+            store.set_status("resumed", "running")
+            assert store.save_results("resumed", "crashed", [(0, {"index": 0, "success": False})], [(1, 0.0)])
+            assert not store.save_results("resumed", "other", [(1, {"index": 1, "success": False})], [])
+            
+            # Results stream only up to the first point still pending
+            assert [index for index, _ in store.read_results("resumed", -1, 10)] == [0]
+            store.close()
+            
+            async def resume():
+                # Two processes sharing the database: only one of them takes the job over
+                managers = [BatchJobManager(location.geocoding_service, CacheService()) for _ in range(2)]
+                for manager in managers:
+                    await manager.start()
+                for _ in range(200):
+                    job = await managers[0].get_job("resumed")
+                    if job["status"] == "completed":
+                        break
+                    await asyncio.sleep(0.02)
+                results = await managers[0].read_results("resumed", -1, 10)
+                for manager in managers:
+                    await manager.stop()
+                return job, results
+            
+            calls.clear()
+            job, results = asyncio.run(resume())
+            assert job["completed"] == 3
+            assert job["owner"] != "crashed"
+            assert [index for index, _ in results] == [0, 1, 2]
+            assert sorted(calls) == [(-42.0, 150.0), (-41.0, 150.0)]
+        finally:
+            location.geocoding_service.reverse_geocode, settings.JOBS_DB_PATH, settings.JOB_RETRY_BACKOFF_SECONDS = original
+    
+    print("✅ Batch jobs working correctly")
+
+def test_provider_deadline():
+    """Test that a provider call is cut off when the request deadline runs out"""
+    import asyncio
+    import time
+    from app.services.geocoding import GeocodingService
+    from app.utils.deadline import Deadline
+    
+    async def test_call():
+        service = GeocodingService()
+        
+        async def slow_provider(lat, lng, language, timeout):
+            # Like httpx, honours the timeout per phase rather than for the whole call
+            for _ in range(4):
+                await asyncio.sleep(min(timeout, 0.5))
+            return {"address": "late"}
+        
+        service._mapbox_reverse_geocode = slow_provider
+        outcomes = []
+        started = time.monotonic()
+        result = await service._call_provider("mapbox", -33.8, 151.2, "en", deadline=Deadline.from_ms(300), outcomes=outcomes)
+        assert result is None
+        assert outcomes == ["error"]
+        assert time.monotonic() - started < 0.5
+    
+    asyncio.run(test_call())
+    print("✅ Provider deadline working correctly")
+
 def test_app_creation():
     """Test that the FastAPI app is created correctly"""
     assert app is not None
@@ -49,9 +477,19 @@ if __name__ == "__main__":
     try:
         test_imports()
         test_cache_service() 
+        test_cache_eviction()
+        test_cache_batch_lookup()
+        test_cache_expiry()
+        test_circuit_breaker()
+        test_single_flight()
+        test_provider_deadline()
+        test_token_bucket()
+        test_shared_memory_cache()
+        test_batch_shared_cells()
+        test_batch_jobs()
         test_app_creation()
         print("\n🎉 All tests passed! The serverless version is ready for Vercel deployment.")
-        
+    
     except Exception as e:
         print(f"\n❌ Test failed: {e}")
         sys.exit(1) 
\ No newline at end of file